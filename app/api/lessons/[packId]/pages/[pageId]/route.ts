@@ -0,0 +1,19 @@
+import { NextResponse } from 'next/server';
+import { loadLessonChunks } from '@/lib/lessonLoader';
+import { IMMUTABLE, conditionalJson } from '@/lib/httpCache';
+
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ packId: string; pageId: string }> }
+) {
+  const { packId, pageId } = await params;
+  const chunk = loadLessonChunks(packId)?.pages.get(pageId);
+  if (!chunk) {
+    return NextResponse.json({ error: `Unknown lesson page '${packId}/${pageId}'` }, { status: 404 });
+  }
+  // The table of contents links each page as `?v=<hash>`; only an exact match is immutable.
+  const version = new URL(request.url).searchParams.get('v');
+  return conditionalJson(request, chunk.body, chunk.hash, version === chunk.hash ? IMMUTABLE : 'no-cache');
+}
@@ -0,0 +1,17 @@
+import { NextResponse } from 'next/server';
+import { loadLesson } from '@/lib/lessonLoader';
+import { conditionalJson } from '@/lib/httpCache';
+
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ packId: string }> }
+) {
+  const { packId } = await params;
+  const loaded = loadLesson(packId);
+  if (!loaded) {
+    return NextResponse.json({ error: `Unknown lesson '${packId}'` }, { status: 404 });
+  }
+  return conditionalJson(request, () => JSON.stringify({ lesson: loaded.lesson }), loaded.hash);
+}
@@ -0,0 +1,17 @@
+import { NextResponse } from 'next/server';
+import { loadLessonChunks } from '@/lib/lessonLoader';
+import { conditionalJson } from '@/lib/httpCache';
+
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ packId: string }> }
+) {
+  const { packId } = await params;
+  const chunks = loadLessonChunks(packId);
+  if (!chunks) {
+    return NextResponse.json({ error: `Unknown lesson '${packId}'` }, { status: 404 });
+  }
+  return conditionalJson(request, chunks.toc.body, chunks.toc.hash);
+}
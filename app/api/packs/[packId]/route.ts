@@ -0,0 +1,19 @@
+import { NextResponse } from 'next/server';
+import { getPackPayload } from '@/lib/packLoader';
+import { IMMUTABLE, conditionalJson } from '@/lib/httpCache';
+
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ packId: string }> }
+) {
+  const { packId } = await params;
+  const payload = getPackPayload(packId);
+  if (!payload) {
+    return NextResponse.json({ error: `Unknown pack '${packId}'` }, { status: 404 });
+  }
+  // usePacks requests `?v=<hash>` from the manifest; only an exact match is immutable.
+  const version = new URL(request.url).searchParams.get('v');
+  return conditionalJson(request, payload.body, payload.hash, version === payload.hash ? IMMUTABLE : 'no-cache');
+}
@@ -0,0 +1,11 @@
+import { loadPackManifest } from '@/lib/packLoader';
+import { conditionalJson } from '@/lib/httpCache';
+
+export const dynamic = 'force-dynamic';
+
+// Pack ids and content hashes, so clients fetch /api/packs/[packId] only for packs whose
+// hash differs from the copy they already hold.
+export async function GET(request: Request) {
+  const manifest = loadPackManifest();
+  return conditionalJson(request, JSON.stringify(manifest), manifest.hash);
+}
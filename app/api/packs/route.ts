@@ -1,12 +1,15 @@
-import { NextResponse } from 'next/server';
 import fs from 'fs';
-import { loadChapterPacks } from '@/lib/packLoader';
+import { loadChapterPacks, loadPackManifest } from '@/lib/packLoader';
+import { conditionalJson, contentHash } from '@/lib/httpCache';
 import { CONTENT_DIR, ENRICH_DIR } from '@/lib/paths';
 
 export const dynamic = 'force-dynamic';
 
-export async function GET() {
-  const packs = loadChapterPacks();
+// Serialized once per content version; a 304 skips serialization entirely.
+let cachedBody: { hash: string; body: string } | null = null;
+
+export async function GET(request: Request) {
+  const manifest = loadPackManifest();
   const schemaFiles = new Set(['chapter_pack.schema.json', 'chapter_pack.v2.schema.json']);
   const packFiles = fs.existsSync(CONTENT_DIR)
     ? fs.readdirSync(CONTENT_DIR).filter((file) => file.endsWith('.json') && !schemaFiles.has(file))
@@ -15,9 +18,18 @@ export async function GET() {
     ? fs.readdirSync(ENRICH_DIR).filter((file) => file.endsWith('.enrich.json'))
     : [];
   const compare = (a: string, b: string) => a.localeCompare(b, undefined, { numeric: true, sensitivity: 'base' });
-  return NextResponse.json({
-    packs,
-    pack_files: packFiles.sort(compare),
-    enrichment_files: enrichmentFiles.sort(compare)
-  });
+  packFiles.sort(compare);
+  enrichmentFiles.sort(compare);
+  const hash = contentHash(manifest.hash, packFiles.join('/'), enrichmentFiles.join('/'));
+  if (cachedBody?.hash !== hash) {
+    cachedBody = {
+      hash,
+      body: JSON.stringify({
+        packs: loadChapterPacks(),
+        pack_files: packFiles,
+        enrichment_files: enrichmentFiles
+      })
+    };
+  }
+  return conditionalJson(request, cachedBody.body, hash);
 }
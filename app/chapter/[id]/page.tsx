@@ -8,7 +8,7 @@ import QuestionFlow from '@/components/QuestionFlow';
 import LessonSidebar, { LessonTocModuleEntry } from '@/components/LessonSidebar';
 import LessonContent from '@/components/LessonContent';
 import { useLocalState } from '@/lib/useLocalState';
-import { useLessons } from '@/lib/useLessons';
+import { useLessonChunks } from '@/lib/useLessons';
 import { usePacks } from '@/lib/usePacks';
 import { ChapterLesson, LessonCheck, LessonRecallItem, RunQuestionResult } from '@/lib/types';
 import { buildLessonCheckId, buildRecallItems, getLessonTagSet, LESSON_XP_RULES } from '@/lib/lessonUtils';
@@ -54,11 +54,9 @@ export default function ChapterLessonPage() {
   const pageFromQuery = searchParams?.get('page')?.trim() ?? '';
   const modeFromQuery = searchParams?.get('mode')?.trim() ?? '';
   const { packs, loaded: packsLoaded } = usePacks();
-  const { lessons, loaded: lessonsLoaded } = useLessons();
   const { state, updateState, loaded: stateLoaded } = useLocalState();
 
   const pack = useMemo(() => packs.find((item) => item.pack_id === packId), [packs, packId]);
-  const lesson = useMemo(() => lessons.find((item) => item.pack_id === packId), [lessons, packId]);
 
   const [tab, setTab] = useState<'learn' | 'recall'>('learn');
   const [activeModuleId, setActiveModuleId] = useState<string>('');
@@ -68,6 +66,12 @@ export default function ChapterLessonPage() {
   const [bossResults, setBossResults] = useState<RunQuestionResult[] | null>(null);
   const [tocQuery, setTocQuery] = useState('');
   const contentColumnRef = useRef<HTMLDivElement | null>(null);
+  const {
+    lesson,
+    loadedPageIds,
+    allPagesLoaded,
+    loaded: lessonsLoaded
+  } = useLessonChunks(packId || null, activePageId, tab === 'recall');
 
   const lessonProgress = state.lessonProgress[packId] ?? { completedPages: [], checkResults: {}, xp: 0 };
   const completedPages = useMemo(() => new Set(lessonProgress.completedPages), [lessonProgress.completedPages]);
@@ -112,7 +116,11 @@ export default function ChapterLessonPage() {
     setCheckInputs({});
   }, [activePageId]);
 
-  const recallItems = useMemo(() => (lesson ? buildRecallItems(lesson) : []), [lesson]);
+  // Recall prompts span the whole chapter, so they wait until every page chunk is loaded.
+  const recallItems = useMemo(
+    () => (lesson && allPagesLoaded ? buildRecallItems(lesson) : []),
+    [lesson, allPagesLoaded]
+  );
   const recallState = state.lessonRecall[packId]?.items ?? {};
   const now = new Date();
   const dueRecallItems = recallItems.filter((item) => {
@@ -850,6 +858,10 @@ export default function ChapterLessonPage() {
                     />
                 )}
               </div>
+            ) : activePage && !loadedPageIds.has(activePage.id) ? (
+              <div className="card lesson-content-card">
+                <div className="lesson-empty-state">Loading page...</div>
+              </div>
             ) : (
               <LessonContent
                 activeModule={activeModule}
@@ -890,7 +902,9 @@ export default function ChapterLessonPage() {
 
           <div className="grid" style={{ gap: 12 }}>
             {activeRecallItems.length === 0 && (
-              <div className="card" style={{ color: 'var(--muted)' }}>No recall items due right now.</div>
+              <div className="card" style={{ color: 'var(--muted)' }}>
+                {allPagesLoaded ? 'No recall items due right now.' : 'Loading recall items...'}
+              </div>
             )}
             {activeRecallItems.map((item) => renderRecallItem(item))}
           </div>
@@ -18,7 +18,6 @@ const MASTERY_THRESHOLD = 95;
 export default function MissionPage() {
   const params = useParams();
   const { packs, loaded } = usePacks();
-  const { lessons } = useLessons();
   const { state, updateState, loaded: stateLoaded } = useLocalState();
   const [completed, setCompleted] = useState(false);
   const paramValue = params?.missionId;
@@ -41,6 +40,7 @@ export default function MissionPage() {
     }
     return null;
   }, [packs, missionId]);
+  const { lessons } = useLessons(missionData?.pack.pack_id ?? null);
 
   if (!loaded) {
     return <div className="card">Loading mission...</div>;
@@ -8,7 +8,8 @@ type OutlineSection = {
   order: number;
   title: string;
   href: string;
-  word_count: number;
+  // null when the outline came from `--outline-source toc` without word counts.
+  word_count: number | null;
   hash?: string;
 };
 
@@ -16,7 +17,7 @@ type OutlineChapter = {
   order: number;
   title: string;
   href: string;
-  word_count: number;
+  word_count: number | null;
   hash?: string;
   sections: OutlineSection[];
 };
@@ -97,7 +98,7 @@ function flattenOutline(doc: OutlineDoc): FlatOutlineRow[] {
         chapterTitle: chapter.title,
         title: section.title,
         href: section.href,
-        wordCount: section.word_count,
+        wordCount: section.word_count ?? 0,
         status: 'unmapped',
         mapped: false
       }));
@@ -111,7 +112,7 @@ function flattenOutline(doc: OutlineDoc): FlatOutlineRow[] {
         chapterTitle: chapter.title,
         title: chapter.title,
         href: chapter.href,
-        wordCount: chapter.word_count,
+        wordCount: chapter.word_count ?? 0,
         status: 'unmapped',
         mapped: false
       }
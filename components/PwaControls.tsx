@@ -144,6 +144,7 @@ export default function PwaControls() {
   const refreshContent = async () => {
     if (!('serviceWorker' in navigator)) return;
     window.localStorage.removeItem('secplus_packs_cache_v1');
+    window.localStorage.removeItem('secplus_packs_cache_hash_v1');
     window.localStorage.removeItem('secplus_lessons_cache_v1');
     window.localStorage.removeItem('secplus_lessons_update_available');
     setContentUpdate(false);
@@ -15,7 +15,8 @@ export default [
       '.next/**',
       'node_modules/**',
       'out/**',
-      'coverage/**'
+      'coverage/**',
+      'lib/generated/**'
     ]
   }
 ];
@@ -5,7 +5,8 @@ export type OutlineSectionNode = {
   order: number;
   title: string;
   href: string;
-  word_count: number;
+  // null when the outline came from `--outline-source toc` without word counts.
+  word_count: number | null;
   hash?: string;
 };
 
@@ -13,7 +14,7 @@ export type OutlineChapterNode = {
   order: number;
   title: string;
   href: string;
-  word_count: number;
+  word_count: number | null;
   hash?: string;
   sections: OutlineSectionNode[];
 };
@@ -21,6 +22,8 @@ export type OutlineChapterNode = {
 export type OutlineDoc = {
   generated_at: string;
   source_epub?: string;
+  // Digest behind the section/chapter hashes, e.g. "sha256" or "blake2b-256" (`--hash`).
+  hash_algorithm?: string;
   chapters: OutlineChapterNode[];
 };
 
@@ -200,7 +203,7 @@ function flattenOutline(outlineDoc: OutlineDoc | null | undefined) {
         sectionOrder: section.order,
         title: section.title,
         href: section.href,
-        wordCount: section.word_count
+        wordCount: section.word_count ?? 0
       }));
     }
     return [
@@ -211,7 +214,7 @@ function flattenOutline(outlineDoc: OutlineDoc | null | undefined) {
         sectionOrder: 0,
         title: chapter.title,
         href: chapter.href,
-        wordCount: chapter.word_count
+        wordCount: chapter.word_count ?? 0
       }
     ];
   });
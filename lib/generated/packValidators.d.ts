@@ -0,0 +1,10 @@
+// Types for packValidators.js, which `npm run packs:compile` (scripts/build-pack-validators.mjs)
+// generates from the chapter-pack schemas with Ajv standalone code. The .js file is not committed;
+// lib/packLoader.ts requires it at runtime when present and compiles the schemas otherwise.
+import type { ValidateFunction } from 'ajv';
+
+// Precompiled validators, one per entry in schemaFiles (v2 first).
+export const packValidators: ValidateFunction[];
+export const schemaFiles: string[];
+// SHA-256 over the schema files the validators were compiled from.
+export const schemaDigest: string;
@@ -0,0 +1,48 @@
+import crypto from 'crypto';
+import { NextResponse } from 'next/server';
+
+// Conditional-GET helpers for the content API routes. Responses carry a strong ETag derived
+// from a content hash and `Cache-Control: no-cache`, so browsers and the service worker
+// revalidate on every use and an unchanged payload costs a 304 instead of a re-download.
+
+export function contentHash(...parts: Array<string | Buffer>) {
+  const hash = crypto.createHash('sha256');
+  parts.forEach((part) => {
+    hash.update(part);
+    hash.update('\n');
+  });
+  return hash.digest('hex');
+}
+
+export function etagFor(hash: string) {
+  return `"${hash}"`;
+}
+
+export function matchesIfNoneMatch(request: Request, etag: string) {
+  const header = request.headers.get('if-none-match');
+  if (!header) return false;
+  if (header.trim() === '*') return true;
+  // Weak comparison (RFC 9110 §13.1.2): a proxy may have weakened our tag with W/.
+  return header.split(',').some((tag) => tag.trim().replace(/^W\//, '') === etag);
+}
+
+// Hash-addressed URLs (`?v=<hash>`) never change content, so they may be cached for good.
+export const IMMUTABLE = 'public, max-age=31536000, immutable';
+
+// `body` may be a thunk so a 304 skips serializing the payload.
+export function conditionalJson(
+  request: Request,
+  body: string | (() => string),
+  hash: string,
+  cacheControl = 'no-cache'
+) {
+  const etag = etagFor(hash);
+  const headers = { ETag: etag, 'Cache-Control': cacheControl };
+  if (matchesIfNoneMatch(request, etag)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+  return new NextResponse(typeof body === 'function' ? body() : body, {
+    status: 200,
+    headers: { ...headers, 'Content-Type': 'application/json' }
+  });
+}
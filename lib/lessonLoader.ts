@@ -1,14 +1,41 @@
+import crypto from 'crypto';
 import fs from 'fs';
 import path from 'path';
 import Ajv from 'ajv/dist/2020.js';
 import type { ValidateFunction } from 'ajv';
-import { ChapterLesson } from './types';
+import { ChapterLesson, LessonToc } from './types';
 import { normalizeLessonObjectives } from './objectiveIds';
-import { LESSON_DIR } from './paths';
+import { GENERATED_DIR, LESSON_DIR } from './paths';
 
 const SCHEMA_FILES = ['chapter_lessons.v3.schema.json', 'chapter_lessons.v2.schema.json', 'chapter_lessons.schema.json'];
-let cache: ChapterLesson[] | null = null;
+const LESSON_LRU_SIZE = 4;
+// Written by `npm run lessons:validate` (run by `dev` and `start`).
+const LESSON_INDEX_FILE = 'lesson_index.json';
+const IS_PRODUCTION = process.env.NODE_ENV === 'production';
+
+export type LessonIndexEntry = {
+  pack_id: string;
+  file: string;
+  version: string;
+  module_ids: string[];
+  page_ids: string[];
+};
+
+export type LoadedLesson = { lesson: ChapterLesson; hash: string };
+
+export type LessonChunk = { body: string; hash: string };
+
+export type LessonChunks = { toc: LessonChunk; pages: Map<string, LessonChunk> };
+
+type IndexedFile = { stamp: string; entry: LessonIndexEntry | null };
+type CachedLesson = LoadedLesson & { stamp: string; chunks?: LessonChunks };
+
+let cache: { stamp: string; lessons: ChapterLesson[] } | null = null;
 let validators: ValidateFunction[] | null = null;
+let indexFiles: Map<string, IndexedFile> | null = null;
+let index: Map<string, LessonIndexEntry> | null = null;
+// Least recently used first; Map iteration order is insertion order.
+const lessonLru = new Map<string, CachedLesson>();
 
 function getValidators() {
   if (validators) return validators;
@@ -40,16 +67,181 @@ function validateLesson(lesson: unknown) {
   return { valid: false as const, errors };
 }
 
-export function loadChapterLessons(): ChapterLesson[] {
-  if (process.env.NODE_ENV !== 'production') {
-    cache = null;
-  }
-  if (cache) return cache;
+function listLessonFiles() {
   if (!fs.existsSync(LESSON_DIR)) return [];
-
-  const files = fs
+  return fs
     .readdirSync(LESSON_DIR)
-    .filter((file) => file.endsWith('.lesson.json'));
+    .filter((file) => file.endsWith('.lesson.json'))
+    .sort((a, b) => a.localeCompare(b, undefined, { numeric: true, sensitivity: 'base' }));
+}
+
+// Files are re-read only when their mtime or size changes, so development picks up edits
+// without re-parsing every lesson on each request. Must match fileStamp() in
+// scripts/validate-lessons.mjs.
+function fileStamp(file: string) {
+  const stat = fs.statSync(path.join(LESSON_DIR, file));
+  return `${stat.mtimeMs}:${stat.size}`;
+}
+
+function indexEntry(file: string): LessonIndexEntry | null {
+  let lesson: ChapterLesson;
+  try {
+    lesson = JSON.parse(fs.readFileSync(path.join(LESSON_DIR, file), 'utf8')) as ChapterLesson;
+  } catch (err) {
+    console.warn(`Failed to parse lesson ${file}:`, err);
+    return null;
+  }
+  if (typeof lesson?.pack_id !== 'string' || !Array.isArray(lesson.modules)) {
+    console.warn(`Invalid lesson ${file}: missing pack_id or modules`);
+    return null;
+  }
+  return {
+    pack_id: lesson.pack_id,
+    file,
+    version: lesson.version,
+    module_ids: lesson.modules.map((module) => module.id),
+    page_ids: lesson.modules.flatMap((module) => (module.pages ?? []).map((page) => page.id))
+  };
+}
+
+// The build-time index from scripts/validate-lessons.mjs, keyed by file with the stamp each
+// entry was read at. Empty when it has not been generated or cannot be read.
+function loadGeneratedIndex() {
+  const indexPath = path.join(GENERATED_DIR, LESSON_INDEX_FILE);
+  const files = new Map<string, IndexedFile>();
+  if (!fs.existsSync(indexPath)) {
+    console.warn(`${indexPath} not found; indexing lessons at runtime. Run \`npm run lessons:validate\`.`);
+    return files;
+  }
+  try {
+    const generated = JSON.parse(fs.readFileSync(indexPath, 'utf8')) as {
+      lessons?: Array<LessonIndexEntry & { stamp: string }>;
+    };
+    (generated.lessons ?? []).forEach(({ stamp, ...entry }) => files.set(entry.file, { stamp, entry }));
+  } catch (err) {
+    console.warn(`Ignoring unreadable ${indexPath}:`, err);
+  }
+  return files;
+}
+
+// pack_id -> file, version, module and page ids. It starts from the build-time index, so a cold
+// start only stats the lesson files; a file is parsed here only when it is missing from that
+// index or has changed since. Lesson bodies are loaded on demand by loadLesson().
+export function loadLessonIndex(): Map<string, LessonIndexEntry> {
+  if (index && IS_PRODUCTION) return index;
+  const previous = indexFiles ?? loadGeneratedIndex();
+  const next = new Map<string, IndexedFile>();
+  let changed = !indexFiles;
+  const files = listLessonFiles();
+  files.forEach((file) => {
+    const stamp = fileStamp(file);
+    const known = previous.get(file);
+    if (known && known.stamp === stamp) {
+      next.set(file, known);
+      return;
+    }
+    changed = true;
+    next.set(file, { stamp, entry: indexEntry(file) });
+  });
+  if (index && !changed && previous.size === next.size) return index;
+
+  const entries = new Map<string, LessonIndexEntry>();
+  next.forEach(({ entry }) => {
+    if (!entry) return;
+    const existing = entries.get(entry.pack_id);
+    if (existing) {
+      console.warn(`Lesson ${entry.file} duplicates pack_id ${entry.pack_id} from ${existing.file}; ignoring it.`);
+      return;
+    }
+    entries.set(entry.pack_id, entry);
+  });
+  indexFiles = next;
+  index = entries;
+  return entries;
+}
+
+function sha256(data: Buffer | string) {
+  return crypto.createHash('sha256').update(data).digest('hex');
+}
+
+function readLesson(file: string): LoadedLesson | null {
+  let raw: Buffer;
+  let lesson: ChapterLesson;
+  try {
+    raw = fs.readFileSync(path.join(LESSON_DIR, file));
+    lesson = JSON.parse(raw.toString('utf8')) as ChapterLesson;
+  } catch (err) {
+    console.warn(`Failed to parse lesson ${file}:`, err);
+    return null;
+  }
+  const validation = validateLesson(lesson);
+  if (!validation.valid) {
+    console.warn(`Invalid lesson ${file}: ${validation.errors.join('; ')}`);
+    return null;
+  }
+  return {
+    lesson: normalizeLessonObjectives(lesson),
+    hash: sha256(raw)
+  };
+}
+
+// Reads, validates and normalizes one lesson, keeping the most recently used few in memory.
+// The hash covers the source file and serves as the lesson's ETag.
+export function loadLesson(packId: string): LoadedLesson | null {
+  const entry = loadLessonIndex().get(packId);
+  if (!entry) return null;
+  const stamp = indexFiles?.get(entry.file)?.stamp ?? '';
+  const cached = lessonLru.get(packId);
+  lessonLru.delete(packId);
+  if (cached && cached.stamp === stamp) {
+    lessonLru.set(packId, cached);
+    return cached;
+  }
+  const loaded = readLesson(entry.file);
+  if (!loaded) return null;
+  const next: CachedLesson = { ...loaded, stamp };
+  lessonLru.set(packId, next);
+  while (lessonLru.size > LESSON_LRU_SIZE) {
+    lessonLru.delete(lessonLru.keys().next().value as string);
+  }
+  return next;
+}
+
+function splitLesson(lesson: ChapterLesson): LessonChunks {
+  const pages = new Map<string, LessonChunk>();
+  const toc: LessonToc = {
+    pack_id: lesson.pack_id,
+    version: lesson.version,
+    objectiveIds: lesson.objectiveIds,
+    modules: lesson.modules.map((module) => ({
+      ...module,
+      pages: module.pages.map((page) => {
+        const body = JSON.stringify(page);
+        const hash = sha256(body);
+        pages.set(page.id, { body, hash });
+        return { id: page.id, title: page.title, objectiveIds: page.objectiveIds, hash };
+      })
+    }))
+  };
+  const tocBody = JSON.stringify(toc);
+  return { toc: { body: tocBody, hash: sha256(tocBody) }, pages };
+}
+
+// A lesson split into a table of contents and one chunk per page, so the chapter view fetches
+// the page being read instead of the whole lesson. Chunks live with the cached lesson and are
+// rebuilt only when its source file changes.
+export function loadLessonChunks(packId: string): LessonChunks | null {
+  const loaded = loadLesson(packId) as CachedLesson | null;
+  if (!loaded) return null;
+  if (!loaded.chunks) loaded.chunks = splitLesson(loaded.lesson);
+  return loaded.chunks;
+}
+
+export function loadChapterLessons(): ChapterLesson[] {
+  if (cache && IS_PRODUCTION) return cache.lessons;
+  const files = listLessonFiles();
+  const stamp = files.map((file) => `${file}@${fileStamp(file)}`).join('|');
+  if (cache && cache.stamp === stamp) return cache.lessons;
 
   const lessons: ChapterLesson[] = [];
 
@@ -70,10 +262,10 @@ export function loadChapterLessons(): ChapterLesson[] {
     lessons.push(normalizeLessonObjectives(lesson));
   });
 
-  cache = lessons;
+  cache = { stamp, lessons };
   return lessons;
 }
 
 export function getLessonByPackId(packId: string) {
-  return loadChapterLessons().find((lesson) => lesson.pack_id === packId);
+  return loadLesson(packId)?.lesson;
 }
@@ -1,17 +1,36 @@
+import crypto from 'crypto';
 import fs from 'fs';
+import { createRequire } from 'module';
 import path from 'path';
 import Ajv from 'ajv/dist/2020.js';
 import type { ValidateFunction } from 'ajv';
 import { ChapterPack, Mission, PackEnrichment, Question } from './types';
 import { normalizePackObjectives } from './objectiveIds';
-import { CONTENT_DIR, ENRICH_DIR } from './paths';
+import { CONTENT_DIR, ENRICH_DIR, GENERATED_DIR } from './paths';
 
 const SCHEMA_FILES = ['chapter_pack.v2.schema.json', 'chapter_pack.schema.json'];
 const ENRICH_SCHEMA_FILE = 'chapter_enrichment.schema.json';
+const VALIDATED_MANIFEST = 'validated_packs.json';
+const PRECOMPILED_VALIDATORS = 'packValidators.js';
 let cache: ChapterPack[] | null = null;
 let validators: ValidateFunction[] | null = null;
+let currentSchemaDigest: string | null = null;
 let enrichmentValidator: ValidateFunction | null = null;
 let enrichmentCache: Map<string, { data: PackEnrichment; file: string }> | null = null;
+let payloadCache: Map<string, PackPayload> | null = null;
+let manifestCache: PackManifest | null = null;
+
+export type PackPayload = { body: string; hash: string };
+
+export type PackManifestEntry = {
+  pack_id: string;
+  chapter_number: number | null;
+  title: string;
+  hash: string;
+  bytes: number;
+};
+
+export type PackManifest = { hash: string; packs: PackManifestEntry[] };
 
 function comparePackOrder(a: ChapterPack, b: ChapterPack) {
   const chapterA = Number.isFinite(a.chapter?.number) ? a.chapter.number : Number.MAX_SAFE_INTEGER;
@@ -20,8 +39,67 @@ function comparePackOrder(a: ChapterPack, b: ChapterPack) {
   return a.pack_id.localeCompare(b.pack_id, undefined, { numeric: true, sensitivity: 'base' });
 }
 
+function sha256(data: Buffer | string) {
+  return crypto.createHash('sha256').update(data).digest('hex');
+}
+
+// Must match schemaDigest() in scripts/build-pack-validators.mjs and scripts/validate-packs.mjs.
+function schemaDigest() {
+  if (currentSchemaDigest) return currentSchemaDigest;
+  const hash = crypto.createHash('sha256');
+  SCHEMA_FILES.forEach((file) => {
+    const schemaPath = path.join(CONTENT_DIR, file);
+    if (!fs.existsSync(schemaPath)) return;
+    hash.update(`${file}\n`);
+    hash.update(fs.readFileSync(schemaPath));
+    hash.update('\n');
+  });
+  currentSchemaDigest = hash.digest('hex');
+  return currentSchemaDigest;
+}
+
+// Pack files that `npm run packs:validate` already accepted under the current schemas.
+function loadValidatedHashes() {
+  const manifestPath = path.join(GENERATED_DIR, VALIDATED_MANIFEST);
+  if (!fs.existsSync(manifestPath)) return new Map<string, string>();
+  try {
+    const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8')) as {
+      schema_digest?: string;
+      packs?: Record<string, string>;
+    };
+    if (manifest.schema_digest !== schemaDigest()) return new Map<string, string>();
+    return new Map(Object.entries(manifest.packs ?? {}));
+  } catch (err) {
+    console.warn(`Ignoring unreadable ${manifestPath}:`, err);
+    return new Map<string, string>();
+  }
+}
+
+// `npm run packs:compile` output is not committed, so it is required at runtime when present
+// instead of imported; a checkout that has not run it falls back to compiling with Ajv.
+function loadPrecompiledValidators(): typeof import('./generated/packValidators') | null {
+  const modulePath = path.join(GENERATED_DIR, PRECOMPILED_VALIDATORS);
+  if (!fs.existsSync(modulePath)) return null;
+  try {
+    return createRequire(modulePath)(modulePath);
+  } catch (err) {
+    console.warn(`Ignoring unloadable ${modulePath}:`, err);
+    return null;
+  }
+}
+
 function getValidators() {
   if (validators) return validators;
+  const precompiled = loadPrecompiledValidators();
+  if (precompiled?.schemaDigest === schemaDigest() && precompiled.packValidators.length > 0) {
+    validators = precompiled.packValidators;
+    return validators;
+  }
+  console.warn(
+    precompiled
+      ? 'Pack schemas changed since the validators were precompiled; run `npm run packs:compile`.'
+      : 'Pack validators are not precompiled; run `npm run packs:compile`.'
+  );
   const ajv = new Ajv({ allErrors: true, strict: false });
   validators = SCHEMA_FILES
     .map((file) => {
@@ -121,20 +199,24 @@ export function loadChapterPacks(): ChapterPack[] {
     .sort((a, b) => a.localeCompare(b, undefined, { numeric: true, sensitivity: 'base' }));
 
   const enrichments = loadEnrichmentMap();
+  const validatedHashes = loadValidatedHashes();
   const packs: ChapterPack[] = [];
   files.forEach((file) => {
-    const raw = fs.readFileSync(path.join(CONTENT_DIR, file), 'utf8');
+    const raw = fs.readFileSync(path.join(CONTENT_DIR, file));
     let pack: ChapterPack;
     try {
-      pack = JSON.parse(raw) as ChapterPack;
+      pack = JSON.parse(raw.toString('utf8')) as ChapterPack;
     } catch (err) {
       console.warn(`Failed to parse pack ${file}:`, err);
       return;
     }
-    const validation = validatePack(pack);
-    if (!validation.valid) {
-      console.warn(`Invalid pack ${file}: ${validation.errors.join('; ')}`);
-      return;
+    // Unchanged packs were validated before the server started; only edited ones need Ajv.
+    if (validatedHashes.get(file) !== sha256(raw)) {
+      const validation = validatePack(pack);
+      if (!validation.valid) {
+        console.warn(`Invalid pack ${file}: ${validation.errors.join('; ')}`);
+        return;
+      }
     }
     pack = normalizePackObjectives(pack);
     const enrichment = enrichments.get(pack.pack_id);
@@ -159,6 +241,41 @@ export function loadChapterPacks(): ChapterPack[] {
   return packs;
 }
 
+// Packs serialized exactly as /api/packs/[packId] serves them, in pack order. The hash covers
+// the normalized, enriched pack, so editing either the pack or its enrichment changes it.
+export function loadPackPayloads() {
+  if (payloadCache) return payloadCache;
+  const payloads = new Map<string, PackPayload>();
+  loadChapterPacks().forEach((pack) => {
+    const body = JSON.stringify(pack);
+    payloads.set(pack.pack_id, { body, hash: sha256(body) });
+  });
+  payloadCache = payloads;
+  return payloads;
+}
+
+export function getPackPayload(packId: string) {
+  return loadPackPayloads().get(packId) ?? null;
+}
+
+export function loadPackManifest(): PackManifest {
+  if (manifestCache) return manifestCache;
+  const payloads = loadPackPayloads();
+  const packs = loadChapterPacks().map((pack) => {
+    const payload = payloads.get(pack.pack_id) as PackPayload;
+    return {
+      pack_id: pack.pack_id,
+      chapter_number: Number.isFinite(pack.chapter?.number) ? pack.chapter.number : null,
+      title: pack.chapter?.title ?? pack.pack_id,
+      hash: payload.hash,
+      bytes: Buffer.byteLength(payload.body)
+    };
+  });
+  const hash = sha256(packs.map((entry) => `${entry.pack_id}:${entry.hash}`).join('\n'));
+  manifestCache = { hash, packs };
+  return manifestCache;
+}
+
 export function getPackById(packId: string) {
   return loadChapterPacks().find((pack) => pack.pack_id === packId);
 }
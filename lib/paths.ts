@@ -5,3 +5,4 @@ export const CONTENT_DIR = path.join(ROOT_DIR, 'content', 'chapter_packs');
 export const ENRICH_DIR = path.join(ROOT_DIR, 'content', 'chapter_enrichment');
 export const LESSON_DIR = path.join(ROOT_DIR, 'content', 'chapter_lessons');
 export const OBJECTIVES_DIR = path.join(ROOT_DIR, 'content', 'objectives');
+export const GENERATED_DIR = path.join(ROOT_DIR, 'lib', 'generated');
@@ -308,6 +308,20 @@ export type ChapterLesson = {
   modules: LessonModule[];
 };
 
+/** Table of contents for a chunked lesson: module and page headings without page bodies. */
+export type LessonTocPage = Pick<LessonPage, 'id' | 'title' | 'objectiveIds'> & {
+  /** Content hash of the page chunk at /api/lessons/[packId]/pages/[pageId]. */
+  hash: string;
+};
+
+export type LessonTocModule = Omit<LessonModule, 'pages'> & {
+  pages: LessonTocPage[];
+};
+
+export type LessonToc = Omit<ChapterLesson, 'modules'> & {
+  modules: LessonTocModule[];
+};
+
 export type QuestionBase = {
   id: string;
   type: 'mcq' | 'multi_select' | 'matching' | 'ordering';
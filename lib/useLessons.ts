@@ -1,13 +1,15 @@
 'use client';
 
-import { useEffect, useState } from 'react';
-import { ChapterLesson } from './types';
+import { useEffect, useMemo, useRef, useState } from 'react';
+import { ChapterLesson, LessonPage, LessonToc, LessonTocPage } from './types';
 
 const CACHE_KEY = 'secplus_lessons_cache_v1';
 const VERSION_KEY = 'secplus_lessons_versions_v1';
 const UPDATE_KEY = 'secplus_lessons_update_available';
 
-function getLessonVersions(lessons: ChapterLesson[]) {
+type LessonVersion = Pick<ChapterLesson, 'pack_id' | 'version'>;
+
+function getLessonVersions(lessons: LessonVersion[]) {
   return lessons.reduce<Record<string, string>>((acc, lesson) => {
     acc[lesson.pack_id] = lesson.version;
     return acc;
@@ -20,12 +22,100 @@ function hasVersionChange(prev: Record<string, string> | null, next: Record<stri
     || Object.keys(prev).some((key) => !(key in next));
 }
 
-export function useLessons() {
+function mergeLessonVersions(lessons: LessonVersion[]) {
+  try {
+    const prevRaw = window.localStorage.getItem(VERSION_KEY);
+    const prevVersions = prevRaw ? (JSON.parse(prevRaw) as Record<string, string>) : {};
+    const nextVersions = getLessonVersions(lessons);
+    const changed = lessons.some((lesson) =>
+      prevVersions[lesson.pack_id] && prevVersions[lesson.pack_id] !== lesson.version
+    );
+    window.localStorage.setItem(VERSION_KEY, JSON.stringify({ ...prevVersions, ...nextVersions }));
+    return changed;
+  } catch {
+    return false;
+  }
+}
+
+// Loads the single lesson for `packId` from /api/lessons/[packId]. The service worker keeps
+// the response for offline use, so nothing is mirrored into localStorage.
+function useChapterLesson(packId: string | null, enabled: boolean) {
   const [lessons, setLessons] = useState<ChapterLesson[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [loaded, setLoaded] = useState(false);
 
   useEffect(() => {
+    if (!enabled) return;
+    if (!packId) {
+      // Nothing to fetch yet; report an empty, settled result rather than loading forever.
+      setLessons([]);
+      setError(null);
+      setLoaded(true);
+      return;
+    }
+    let active = true;
+    let updateTimer: number | undefined;
+    const basePath = (process.env.NEXT_PUBLIC_BASE_PATH || '').replace(/\/$/, '');
+    const url = `${basePath}/api/lessons/${encodeURIComponent(packId)}`;
+    setLoaded(false);
+    setError(null);
+
+    const load = async () => {
+      try {
+        const res = await fetch(url, { cache: 'no-cache' });
+        if (res.status === 404) {
+          if (active) setLessons([]);
+          return;
+        }
+        if (!res.ok) throw new Error('Failed to load lessons');
+        const data = (await res.json()) as { lesson: ChapterLesson };
+        if (!active) return;
+        setLessons([data.lesson]);
+        mergeLessonVersions([data.lesson]);
+
+        const checkForUpdates = async () => {
+          try {
+            if (!navigator.onLine) return;
+            const freshRes = await fetch(`${url}?fresh=1`, {
+              cache: 'no-cache',
+              headers: { 'x-skip-cache': '1' }
+            });
+            if (!freshRes.ok) return;
+            const freshData = (await freshRes.json()) as { lesson: ChapterLesson };
+            if (mergeLessonVersions([freshData.lesson])) {
+              window.localStorage.setItem(UPDATE_KEY, new Date().toISOString());
+              window.dispatchEvent(new CustomEvent('secplus-content-update', { detail: { type: 'lessons' } }));
+            }
+          } catch {
+            // ignore background check errors
+          }
+        };
+
+        updateTimer = window.setTimeout(checkForUpdates, 1200);
+      } catch (err) {
+        if (active) setError((err as Error).message);
+      } finally {
+        if (active) setLoaded(true);
+      }
+    };
+
+    load();
+    return () => {
+      active = false;
+      window.clearTimeout(updateTimer);
+    };
+  }, [enabled, packId]);
+
+  return { lessons, error, loaded };
+}
+
+function useAllLessons(enabled: boolean) {
+  const [lessons, setLessons] = useState<ChapterLesson[]>([]);
+  const [error, setError] = useState<string | null>(null);
+  const [loaded, setLoaded] = useState(false);
+
+  useEffect(() => {
+    if (!enabled) return;
     const loadCached = () => {
       try {
         const raw = window.localStorage.getItem(CACHE_KEY);
@@ -80,7 +170,172 @@ export function useLessons() {
     };
 
     load();
-  }, []);
+  }, [enabled]);
 
   return { lessons, error, loaded };
 }
+
+// `useLessons()` loads every lesson (map, review and ops views need them all).
+// `useLessons(packId)` loads only that chapter; pass `null` while the id is not known yet.
+export function useLessons(packId?: string | null) {
+  const single = packId !== undefined;
+  const chapter = useChapterLesson(packId ?? null, single);
+  const all = useAllLessons(!single);
+  return single ? chapter : all;
+}
+
+// Stands in for a page whose chunk is not in memory: heading only, no body.
+function stubPage(entry: LessonTocPage): LessonPage {
+  return { id: entry.id, title: entry.title, objectiveIds: entry.objectiveIds, content_blocks: [], checks: [] };
+}
+
+function pickPages(pages: Record<string, LessonPage>, ids: string[]) {
+  const keep = Object.keys(pages).filter((id) => ids.includes(id));
+  if (keep.length === Object.keys(pages).length) return pages;
+  return keep.reduce<Record<string, LessonPage>>((acc, id) => {
+    acc[id] = pages[id];
+    return acc;
+  }, {});
+}
+
+// Chunked lesson loading for /chapter/[id]: fetches the table of contents, then the chunk for
+// `activePageId` once it names a page in it, then prefetches the page after it. Other pages stay as heading-only stubs
+// (see `loadedPageIds`) and are dropped from memory when the learner moves on; the service
+// worker keeps their hash-addressed chunks, so going back is served from the device.
+// `loadAll` pulls in every page, which Recall Mode needs to build its prompts.
+export function useLessonChunks(packId: string | null, activePageId: string, loadAll = false) {
+  const [toc, setToc] = useState<LessonToc | null>(null);
+  const [pages, setPages] = useState<Record<string, LessonPage>>({});
+  const [error, setError] = useState<string | null>(null);
+  const [loaded, setLoaded] = useState(false);
+  const pagesRef = useRef(pages);
+  pagesRef.current = pages;
+  // In-flight chunk requests, so a prefetch that is still loading is reused, not repeated.
+  const pendingRef = useRef(new Map<string, Promise<LessonPage>>());
+  const basePath = (process.env.NEXT_PUBLIC_BASE_PATH || '').replace(/\/$/, '');
+
+  useEffect(() => {
+    if (!packId) {
+      setToc(null);
+      setPages({});
+      setError(null);
+      setLoaded(true);
+      return;
+    }
+    let active = true;
+    let updateTimer: number | undefined;
+    const url = `${basePath}/api/lessons/${encodeURIComponent(packId)}/toc`;
+    setToc(null);
+    setPages({});
+    setLoaded(false);
+    setError(null);
+
+    const load = async () => {
+      try {
+        const res = await fetch(url, { cache: 'no-cache' });
+        if (res.status === 404) return;
+        if (!res.ok) throw new Error('Failed to load lessons');
+        const data = (await res.json()) as LessonToc;
+        if (!active) return;
+        setToc(data);
+        mergeLessonVersions([data]);
+
+        const checkForUpdates = async () => {
+          try {
+            if (!navigator.onLine) return;
+            const freshRes = await fetch(`${url}?fresh=1`, {
+              cache: 'no-cache',
+              headers: { 'x-skip-cache': '1' }
+            });
+            if (!freshRes.ok) return;
+            if (mergeLessonVersions([(await freshRes.json()) as LessonToc])) {
+              window.localStorage.setItem(UPDATE_KEY, new Date().toISOString());
+              window.dispatchEvent(new CustomEvent('secplus-content-update', { detail: { type: 'lessons' } }));
+            }
+          } catch {
+            // ignore background check errors
+          }
+        };
+
+        updateTimer = window.setTimeout(checkForUpdates, 1200);
+      } catch (err) {
+        if (active) setError((err as Error).message);
+      } finally {
+        if (active) setLoaded(true);
+      }
+    };
+
+    load();
+    return () => {
+      active = false;
+      window.clearTimeout(updateTimer);
+    };
+  }, [basePath, packId]);
+
+  useEffect(() => {
+    if (!toc) return;
+    const entries = toc.modules.flatMap((module) => module.pages);
+    const current = entries.findIndex((entry) => entry.id === activePageId);
+    // Until the page settles on a real page (progress and the query are applied after the TOC
+    // arrives), guessing the first page would fetch a chunk the learner may never see.
+    if (current < 0 && !loadAll) return;
+    let active = true;
+    setError(null);
+    const wanted = loadAll ? entries : entries.slice(current, current + 2);
+    setPages((prev) => pickPages(prev, wanted.map((entry) => entry.id)));
+
+    const fetchPage = async (entry: LessonTocPage) => {
+      if (pagesRef.current[entry.id]) return;
+      const url = `${basePath}/api/lessons/${encodeURIComponent(toc.pack_id)}/pages/${encodeURIComponent(entry.id)}?v=${entry.hash}`;
+      let pending = pendingRef.current.get(url);
+      if (!pending) {
+        pending = fetch(url)
+          .then((res) => {
+            if (!res.ok) throw new Error(`Failed to load lesson page ${entry.id}`);
+            return res.json() as Promise<LessonPage>;
+          })
+          .finally(() => pendingRef.current.delete(url));
+        pendingRef.current.set(url, pending);
+      }
+      try {
+        const page = await pending;
+        if (!active) return;
+        setPages((prev) => ({ ...prev, [entry.id]: page }));
+        if (entry.id === activePageId) setError(null);
+      } catch (err) {
+        if (active) setError((err as Error).message);
+      }
+    };
+
+    // The page being read goes first; the rest are prefetched once it has arrived.
+    const [first, ...rest] = wanted;
+    if (first) {
+      fetchPage(first).then(() => Promise.all(rest.map(fetchPage)));
+    }
+
+    return () => {
+      active = false;
+    };
+  }, [basePath, toc, activePageId, loadAll]);
+
+  const lesson = useMemo<ChapterLesson | null>(() => {
+    if (!toc) return null;
+    return {
+      pack_id: toc.pack_id,
+      version: toc.version,
+      objectiveIds: toc.objectiveIds,
+      modules: toc.modules.map((module) => ({
+        id: module.id,
+        title: module.title,
+        tag_ids: module.tag_ids,
+        objectiveIds: module.objectiveIds,
+        pages: module.pages.map((entry) => pages[entry.id] ?? stubPage(entry))
+      }))
+    };
+  }, [toc, pages]);
+
+  const loadedPageIds = useMemo(() => new Set(Object.keys(pages)), [pages]);
+  const allPagesLoaded = Boolean(toc && toc.modules.every((module) => module.pages.every((entry) => pages[entry.id])));
+
+  return { lesson, loadedPageIds, allPagesLoaded, error, loaded };
+}
@@ -3,7 +3,27 @@
 import { useEffect, useState } from 'react';
 import { ChapterPack } from './types';
 
+// Last-known-good packs for a load that reaches neither the network nor the service worker
+// (first visit offline, a pending worker update, private mode). Rewritten only when the
+// manifest hash changes; the service worker cache remains the primary offline copy.
 const CACHE_KEY = 'secplus_packs_cache_v1';
+const CACHE_HASH_KEY = 'secplus_packs_cache_hash_v1';
+
+type PackManifest = {
+  hash: string;
+  packs: Array<{ pack_id: string; hash: string }>;
+};
+
+// One content sync shared by every component that calls usePacks. It is dropped when it fails
+// and when new content is announced, so the next caller revalidates the manifest.
+let syncPromise: Promise<ChapterPack[]> | null = null;
+
+if (typeof window !== 'undefined') {
+  // Registered before any usePacks listener, so those re-sync against a fresh promise.
+  window.addEventListener('secplus-content-update', () => {
+    syncPromise = null;
+  });
+}
 
 function sortPacks(packs: ChapterPack[]) {
   return [...packs].sort((a, b) => {
@@ -14,44 +34,88 @@ function sortPacks(packs: ChapterPack[]) {
   });
 }
 
+function readCachedPacks() {
+  try {
+    const raw = window.localStorage.getItem(CACHE_KEY);
+    return raw ? sortPacks(JSON.parse(raw) as ChapterPack[]) : null;
+  } catch {
+    return null;
+  }
+}
+
+function writeCachedPacks(hash: string, packs: ChapterPack[]) {
+  try {
+    if (window.localStorage.getItem(CACHE_HASH_KEY) === hash) return;
+    window.localStorage.setItem(CACHE_KEY, JSON.stringify(packs));
+    window.localStorage.setItem(CACHE_HASH_KEY, hash);
+  } catch {
+    // ignore storage errors (quota, private mode)
+  }
+}
+
+// Fetches the manifest, then each pack at its hash-addressed URL. The service worker serves
+// those URLs cache-first (and the server marks them immutable), so a pack crosses the wire
+// once per content version and unchanged packs never leave the device cache.
+async function syncPacks() {
+  const basePath = (process.env.NEXT_PUBLIC_BASE_PATH || '').replace(/\/$/, '');
+  const res = await fetch(`${basePath}/api/packs/manifest`, { cache: 'no-cache' });
+  if (!res.ok) throw new Error('Failed to load packs');
+  const manifest = (await res.json()) as PackManifest;
+  const packs = await Promise.all(
+    manifest.packs.map(async (entry) => {
+      const packRes = await fetch(
+        `${basePath}/api/packs/${encodeURIComponent(entry.pack_id)}?v=${entry.hash}`
+      );
+      if (!packRes.ok) throw new Error(`Failed to load pack ${entry.pack_id}`);
+      return (await packRes.json()) as ChapterPack;
+    })
+  );
+  const sorted = sortPacks(packs);
+  writeCachedPacks(manifest.hash, sorted);
+  return sorted;
+}
+
+function loadPacksOnce() {
+  if (!syncPromise) {
+    syncPromise = syncPacks().catch((err) => {
+      syncPromise = null;
+      throw err;
+    });
+  }
+  return syncPromise;
+}
+
 export function usePacks() {
   const [packs, setPacks] = useState<ChapterPack[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [loaded, setLoaded] = useState(false);
 
   useEffect(() => {
-    const loadCached = () => {
-      try {
-        const raw = window.localStorage.getItem(CACHE_KEY);
-        if (raw) setPacks(sortPacks(JSON.parse(raw)));
-      } catch {
-        // ignore cache errors
-      }
-    };
+    let active = true;
 
-    const load = async () => {
-      try {
-        const basePath = (process.env.NEXT_PUBLIC_BASE_PATH || '').replace(/\/$/, '');
-        const res = await fetch(`${basePath}/api/packs`, { cache: 'no-store' });
-        if (!res.ok) throw new Error('Failed to load packs');
-        const data = await res.json();
-        const sortedPacks = sortPacks(data.packs ?? []);
-        setPacks(sortedPacks);
-        window.localStorage.setItem(CACHE_KEY, JSON.stringify(sortedPacks));
-        const packFiles: string[] = data.pack_files ?? [];
-        const enrichFiles: string[] = data.enrichment_files ?? [];
-        [...packFiles.map((file) => `${basePath}/content/chapter_packs/${file}`),
-          ...enrichFiles.map((file) => `${basePath}/content/chapter_enrichment/${file}`)]
-          .forEach((url) => fetch(url).catch(() => null));
-      } catch (err) {
-        loadCached();
-        setError((err as Error).message);
-      } finally {
-        setLoaded(true);
-      }
-    };
+    const load = () =>
+      loadPacksOnce()
+        .then((next) => {
+          if (!active) return;
+          setPacks(next);
+          setError(null);
+        })
+        .catch((err) => {
+          if (!active) return;
+          const cached = readCachedPacks();
+          if (cached) setPacks(cached);
+          setError((err as Error).message);
+        })
+        .finally(() => {
+          if (active) setLoaded(true);
+        });
 
     load();
+    window.addEventListener('secplus-content-update', load);
+    return () => {
+      active = false;
+      window.removeEventListener('secplus-content-update', load);
+    };
   }, []);
 
   return { packs, error, loaded };
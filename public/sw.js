@@ -1,4 +1,4 @@
-const CACHE_VERSION = 'v3';
+const CACHE_VERSION = 'v4';
 const CORE_CACHE = `secplus-quest-core-${CACHE_VERSION}`;
 const RUNTIME_CACHE = `secplus-quest-runtime-${CACHE_VERSION}`;
 const BASE_PATH = new URL(self.registration.scope).pathname.replace(/\/$/, '');
@@ -27,6 +27,8 @@ const CONTENT_PREFIXES = [
   '/content/chapter_enrichment/'
 ].map(withBase);
 
+const PACK_MANIFEST = withBase('/api/packs/manifest');
+
 const API_PREFIXES = [
   '/api/packs',
   '/api/lessons'
@@ -90,6 +92,41 @@ async function cacheFirst(request) {
   return response;
 }
 
+async function networkFirst(request) {
+  const cache = await caches.open(RUNTIME_CACHE);
+  try {
+    const response = await fetch(request);
+    if (response && response.ok) cache.put(request, response.clone());
+    return response;
+  } catch {
+    const cached = await cache.match(request);
+    return cached || caches.match(withBase('/offline.html'));
+  }
+}
+
+// Hash-addressed API responses (`/api/packs/<id>?v=<hash>`, lesson page chunks) never change,
+// so serve them from cache and drop entries for older hashes of the same path once stored.
+async function cacheVersioned(request) {
+  const cache = await caches.open(RUNTIME_CACHE);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response && response.ok) {
+    await cache.put(request, response.clone());
+    const { pathname, search } = new URL(request.url);
+    const keys = await cache.keys();
+    await Promise.all(
+      keys
+        .filter((key) => {
+          const keyUrl = new URL(key.url);
+          return keyUrl.pathname === pathname && keyUrl.search !== search;
+        })
+        .map((key) => cache.delete(key))
+    );
+  }
+  return response;
+}
+
 self.addEventListener('fetch', (event) => {
   const { request } = event;
   if (request.method !== 'GET') return;
@@ -137,6 +174,16 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
+  if (sameOrigin && path === PACK_MANIFEST) {
+    event.respondWith(networkFirst(request));
+    return;
+  }
+
+  if (sameOrigin && url.searchParams.has('v') && API_PREFIXES.some((prefix) => path.startsWith(prefix))) {
+    event.respondWith(cacheVersioned(request));
+    return;
+  }
+
   if (sameOrigin && API_PREFIXES.some((prefix) => path.startsWith(prefix))) {
     event.respondWith(staleWhileRevalidate(request));
     return;
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Benchmark extract_epub_outline.py against synthetic EPUBs.
+
+The generated books contain filler words only, so the benchmark can run
+anywhere without the copyrighted source EPUB. Each case runs in a fresh
+process so peak RSS is measured per case rather than per benchmark run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import extract_epub_outline as extractor
+
+
+FILLER_WORDS = (
+    "access audit control policy network risk threat vector token cipher "
+    "firewall segment baseline patch incident response identity zero trust "
+    "endpoint telemetry posture vendor review"
+).split()
+
+
+def _filler(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(count))
+
+
+def _chapter_document(
+    rng: random.Random,
+    number: int,
+    sections: int,
+    heading_depth: int,
+    words_per_section: int,
+    malformed: bool,
+) -> str:
+    body = [f"<h1>Chapter {number} {_filler(rng, 3)}</h1>"]
+    for index in range(sections):
+        level = 2 + index % max(1, heading_depth)
+        body.append(f"<h{level}>{_filler(rng, 4)}</h{level}>")
+        remaining = words_per_section
+        while remaining > 0:
+            words = min(remaining, 60)
+            body.append(f"<p>{_filler(rng, words)} <span class=\"term\">{_filler(rng, 2)}</span>&nbsp;&#8217;</p>")
+            remaining -= words
+    if malformed:
+        # Unclosed tags and a bare ampersand make the XML invalid, as in real-world EPUB slop.
+        body.append("<p>unclosed <b>markup & stray<br></p>")
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+        f"<title>Chapter {number}</title><style>p {{ margin: 0; }}</style></head><body>\n"
+        + "\n".join(body)
+        + "\n</body></html>"
+    )
+
+
+def generate_epub(
+    epub_path: Path,
+    chapters: int,
+    sections: int,
+    heading_depth: int,
+    words_per_section: int,
+    malformed_ratio: float,
+    seed: int = 701,
+) -> None:
+    """Write a synthetic EPUB 3 book with the requested shape."""
+    rng = random.Random(seed)
+    manifest: List[str] = []
+    spine: List[str] = []
+    with zipfile.ZipFile(epub_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        archive.writestr(
+            "META-INF/container.xml",
+            '<?xml version="1.0"?><container version="1.0" '
+            'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+            '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+            "</rootfiles></container>",
+        )
+        for number in range(1, chapters + 1):
+            href = f"text/ch{number:03d}.xhtml"
+            malformed = rng.random() < malformed_ratio
+            document = _chapter_document(rng, number, sections, heading_depth, words_per_section, malformed)
+            archive.writestr(f"OEBPS/{href}", document)
+            manifest.append(f'<item id="ch{number}" href="{href}" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="ch{number}"/>')
+        archive.writestr(
+            "OEBPS/content.opf",
+            '<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0" '
+            'unique-identifier="book-id"><metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:identifier id="book-id">urn:secplus:bench:{seed}</dc:identifier>'
+            "<dc:title>Synthetic outline benchmark</dc:title><dc:language>en</dc:language>"
+            '<meta property="dcterms:modified">2000-01-01T00:00:00Z</meta>'
+            "</metadata><manifest>" + "".join(manifest) + "</manifest>"
+            "<spine>" + "".join(spine) + "</spine></package>",
+        )
+
+
+def spine_bytes(epub_path: Path) -> int:
+    with zipfile.ZipFile(epub_path, "r") as archive:
+        return sum(info.file_size for info in archive.infolist() if info.filename.endswith(".xhtml"))
+
+
+def _run_case(epub_path: str, loader: str, engine: str, jobs: int, hash_algorithm: str) -> Dict[str, object]:
+    phases: Dict[str, float] = {}
+    started = time.perf_counter()
+    outline = extractor.build_outline(
+        Path(epub_path),
+        jobs=jobs,
+        options=extractor.ParseOptions(engine=engine, hash_algorithm=hash_algorithm),
+        loader=loader,
+    )
+    phases["build_outline"] = time.perf_counter() - started
+
+    # Serialize through the extractor so json_dumps is the phase --profile reports.
+    profiler = extractor.PhaseProfiler()
+    with extractor.activate_profiler(profiler):
+        extractor.dump_outline_json(outline)
+    phases["json_dumps"] = profiler.phases["json_dumps"]["wall_s"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        extractor.write_markdown(outline, Path(tmp_dir) / "outline.md")
+        phases["write_markdown"] = time.perf_counter() - started
+
+    chapters: List[Dict[str, object]] = outline["chapters"]  # type: ignore[assignment]
+    # Every engine must agree on structure and hashes; this digest makes that checkable.
+    structure = [
+        [chapter["hash"], [section["hash"] for section in chapter["sections"]]]  # type: ignore[attr-defined]
+        for chapter in chapters
+    ]
+    return {
+        "structure_sha256": hashlib.sha256(json.dumps(structure).encode("utf-8")).hexdigest(),
+        "phases_s": {name: round(value, 6) for name, value in phases.items()},
+        "chapters": len(chapters),
+        "sections": sum(len(chapter["sections"]) for chapter in chapters),  # type: ignore[arg-type]
+        "peak_rss_bytes": extractor.peak_rss_bytes(),
+    }
+
+
+def _retained_bytes(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        rows = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del rows
+    return retained
+
+
+def measure_row_memory(epub_path: Path) -> Dict[str, object]:
+    """Compare the memory held by chapter rows as ChapterRecord objects and as JSON dicts.
+
+    Both representations are built from the same parsed outline and share its strings,
+    so the difference is the per-row container overhead that multi-book batches pay.
+    """
+    records = list(extractor.iter_outline(epub_path, loader="zip_fallback"))
+    dicts = [record.to_dict() for record in records]
+    record_bytes = _retained_bytes(lambda: [extractor.ChapterRecord.from_dict(row) for row in dicts])
+    dict_bytes = _retained_bytes(lambda: [record.to_dict() for record in records])
+    return {
+        "chapters": len(records),
+        "sections": sum(len(record.sections) for record in records),
+        "record_bytes": record_bytes,
+        "dict_bytes": dict_bytes,
+        "reduction": round(1 - record_bytes / dict_bytes, 3) if dict_bytes else None,
+    }
+
+
+def hash_speedup(cases: List[Dict[str, object]], hash_algorithms: List[str]) -> Dict[str, object]:
+    """build_outline time under the first algorithm divided by each other's, per loader/engine."""
+    baseline, *others = hash_algorithms
+    seconds = {
+        (case["loader"], case["engine"], case["hash_algorithm"]): case["phases_s"]["build_outline"]  # type: ignore[index]
+        for case in cases
+        if "error" not in case
+    }
+    speedup: Dict[str, object] = {}
+    for loader, engine, label in seconds:
+        if label in others and seconds.get((loader, engine, baseline)) and seconds[(loader, engine, label)]:
+            speedup[f"{loader}/{engine}/{label}"] = round(
+                seconds[(loader, engine, baseline)] / seconds[(loader, engine, label)], 3  # type: ignore[operator]
+            )
+    return {"baseline": baseline, "ratios": speedup}
+
+
+def loader_available(loader: str) -> bool:
+    if loader != "ebooklib":
+        return True
+    try:
+        import ebooklib  # type: ignore  # noqa: F401
+    except ModuleNotFoundError:
+        return False
+    return True
+
+
+def git_revision() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return result.stdout.strip()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the EPUB outline extractor on synthetic books.")
+    parser.add_argument("--chapters", type=int, default=40, help="Spine documents per synthetic book")
+    parser.add_argument("--sections", type=int, default=20, help="Headings per chapter")
+    parser.add_argument("--heading-depth", type=int, default=3, help="Distinct heading levels below h1")
+    parser.add_argument("--words-per-section", type=int, default=400, help="Body words under each heading")
+    parser.add_argument("--malformed-ratio", type=float, default=0.1, help="Share of chapters with broken markup")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes passed to build_outline")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=701, help="Random seed for the generator")
+    parser.add_argument(
+        "--hash-algorithms",
+        default="sha256,blake2b-256,blake2b-128",
+        help="Comma-separated outline hash_algorithm labels to benchmark",
+    )
+    parser.add_argument(
+        "--output",
+        default="content/_reports/outline_benchmark.json",
+        help="Benchmark JSON artifact path",
+    )
+    args = parser.parse_args()
+
+    if args.chapters < 1 or args.repeat < 1 or not 0.0 <= args.malformed_ratio <= 1.0:
+        print("--chapters and --repeat must be positive; --malformed-ratio must be within 0..1", file=sys.stderr)
+        return 1
+    hash_algorithms = [label.strip() for label in args.hash_algorithms.split(",") if label.strip()]
+    try:
+        for label in hash_algorithms:
+            extractor.digest_factory(label)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    cases: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        epub_path = Path(tmp_dir) / "synthetic.epub"
+        generate_epub(
+            epub_path,
+            chapters=args.chapters,
+            sections=args.sections,
+            heading_depth=args.heading_depth,
+            words_per_section=args.words_per_section,
+            malformed_ratio=args.malformed_ratio,
+            seed=args.seed,
+        )
+        epub_size = epub_path.stat().st_size
+        document_bytes = spine_bytes(epub_path)
+
+        for loader in extractor.LOADER_ENGINES:
+            if not loader_available(loader):
+                print(f"Skipping {loader}: not installed.", file=sys.stderr)
+                continue
+            for engine in extractor.PARSER_ENGINES:
+                for hash_algorithm in hash_algorithms:
+                    runs = []
+                    try:
+                        for _ in range(args.repeat):
+                            # A fresh interpreter per run keeps peak RSS attributable to this case.
+                            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                                runs.append(
+                                    executor.submit(
+                                        _run_case, str(epub_path), loader, engine, args.jobs, hash_algorithm
+                                    ).result()
+                                )
+                    except Exception as exc:  # noqa: BLE001 - one failing case must not end the run
+                        cases.append(
+                            {
+                                "loader": loader,
+                                "engine": engine,
+                                "hash_algorithm": hash_algorithm,
+                                "jobs": args.jobs,
+                                "error": f"{type(exc).__name__}: {exc}",
+                            }
+                        )
+                        print(f"{loader:>12} / {engine:<5} / {hash_algorithm:<11} failed: {cases[-1]['error']}", file=sys.stderr)
+                        continue
+                    best = min(runs, key=lambda run: run["phases_s"]["build_outline"])  # type: ignore[index]
+                    seconds = float(best["phases_s"]["build_outline"])  # type: ignore[index]
+                    cases.append(
+                        {
+                            "loader": loader,
+                            "engine": engine,
+                            "hash_algorithm": hash_algorithm,
+                            "jobs": args.jobs,
+                            "mb_per_s": round(document_bytes / (1024 * 1024) / seconds, 3) if seconds else None,
+                            "documents_per_s": round(args.chapters / seconds, 3) if seconds else None,
+                            **best,
+                        }
+                    )
+                    print(
+                        f"{loader:>12} / {engine:<5} / {hash_algorithm:<11} {seconds:.3f}s "
+                        f"({cases[-1]['mb_per_s']} MB/s, {cases[-1]['documents_per_s']} docs/s)"
+                    )
+
+        memory = measure_row_memory(epub_path)
+        print(
+            f"chapter rows: {memory['record_bytes']} bytes as records, "
+            f"{memory['dict_bytes']} bytes as dicts ({memory['reduction']} smaller)"
+        )
+
+    # Hashes differ by algorithm by design, and EbookLib hands back rewritten documents (its
+    # get_content() drops <head>), so engines are only compared under the same loader and algorithm.
+    parity = all(
+        len(
+            {
+                case["structure_sha256"]
+                for case in cases
+                if case["loader"] == loader and case["hash_algorithm"] == label and "error" not in case
+            }
+        )
+        <= 1
+        for loader in extractor.LOADER_ENGINES
+        for label in hash_algorithms
+    )
+    if not parity:
+        print("Engines disagree on outline structure or hashes; see structure_sha256.", file=sys.stderr)
+    failed = [case for case in cases if "error" in case]
+    if failed:
+        print(f"{len(failed)} case(s) failed; see their error field.", file=sys.stderr)
+
+    report = {
+        "generated_at": extractor.now_iso(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "book": {
+            "chapters": args.chapters,
+            "sections_per_chapter": args.sections,
+            "heading_depth": args.heading_depth,
+            "words_per_section": args.words_per_section,
+            "malformed_ratio": args.malformed_ratio,
+            "seed": args.seed,
+            "epub_size_bytes": epub_size,
+            "spine_document_bytes": document_bytes,
+        },
+        "parity": parity,
+        "failed_cases": len(failed),
+        "hash_speedup": hash_speedup(cases, hash_algorithms),
+        "cases": cases,
+        "row_memory": memory,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Benchmark written: {len(cases)} cases -> {output}")
+    return 0 if parity and not failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+import Ajv from 'ajv/dist/2020.js';
+import standaloneCode from 'ajv/dist/standalone/index.js';
+
+// Compiles the chapter-pack schemas ahead of time with Ajv standalone code, so
+// lib/packLoader.ts validates packs without compiling schemas on a cold server start.
+// The module records a digest of the schemas it was built from; the loader falls back
+// to runtime compilation when the schemas have changed since, or when the module has not
+// been generated at all. It is emitted as CommonJS because the loader requires it at runtime
+// rather than importing it, so a checkout without it still builds.
+
+const cwd = process.cwd();
+const packsDir = path.join(cwd, 'content', 'chapter_packs');
+const outputDir = path.join(cwd, 'lib', 'generated');
+const outputPath = path.join(outputDir, 'packValidators.js');
+const schemaExports = [
+  { file: 'chapter_pack.v2.schema.json', name: 'validateChapterPackV2' },
+  { file: 'chapter_pack.schema.json', name: 'validateChapterPackV1' }
+];
+
+// Must match schemaDigest() in lib/packLoader.ts and scripts/validate-packs.mjs.
+function schemaDigest(files) {
+  const hash = crypto.createHash('sha256');
+  files.forEach((file) => {
+    hash.update(`${file}\n`);
+    hash.update(fs.readFileSync(path.join(packsDir, file)));
+    hash.update('\n');
+  });
+  return hash.digest('hex');
+}
+
+const available = schemaExports.filter(({ file }) => fs.existsSync(path.join(packsDir, file)));
+if (available.length === 0) {
+  console.error(`No pack schema found in ${packsDir}`);
+  process.exit(1);
+}
+
+const ajv = new Ajv({ allErrors: true, strict: false, code: { source: true, esm: false } });
+const refs = {};
+available.forEach(({ file, name }) => {
+  const schema = JSON.parse(fs.readFileSync(path.join(packsDir, file), 'utf8'));
+  if (!schema.$id) {
+    console.error(`${file} needs an $id to be compiled into a standalone validator.`);
+    process.exit(1);
+  }
+  ajv.addSchema(schema);
+  refs[name] = schema.$id;
+});
+
+const schemaFiles = available.map(({ file }) => file);
+const moduleCode = [
+  '// Generated by scripts/build-pack-validators.mjs; do not edit.',
+  standaloneCode(ajv, refs),
+  `exports.packValidators = [${available.map(({ name }) => `exports.${name}`).join(', ')}];`,
+  `exports.schemaFiles = ${JSON.stringify(schemaFiles)};`,
+  `exports.schemaDigest = ${JSON.stringify(schemaDigest(schemaFiles))};`,
+  ''
+].join('\n');
+
+fs.mkdirSync(outputDir, { recursive: true });
+fs.writeFileSync(outputPath, moduleCode);
+console.log(`Compiled ${schemaFiles.length} pack schema(s) -> ${path.relative(cwd, outputPath)}`);
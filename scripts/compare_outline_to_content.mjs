@@ -1,8 +1,17 @@
 import fs from 'fs';
 import path from 'path';
+import { isOutlineBinary, openOutlineBinary } from './outline_binary.mjs';
 
 const cwd = process.cwd();
-const outlinePath = path.join(cwd, 'content', '_source_outline', 'book_outline.json');
+const args = process.argv.slice(2);
+const outlineArg = args.find((arg) => arg.startsWith('--outline='));
+const defaultOutlinePath = path.join(cwd, 'content', '_source_outline', 'book_outline.json');
+const outlinePath = outlineArg ? path.resolve(cwd, outlineArg.slice('--outline='.length)) : defaultOutlinePath;
+// With --previous-outline=<path>, sections whose hash changed since that outline are flagged.
+const previousOutlineArg = args.find((arg) => arg.startsWith('--previous-outline='));
+const previousOutlinePath = previousOutlineArg
+  ? path.resolve(cwd, previousOutlineArg.slice('--previous-outline='.length))
+  : null;
 const packsDir = path.join(cwd, 'content', 'chapter_packs');
 const lessonsDir = path.join(cwd, 'content', 'chapter_lessons');
 const outputPath = path.join(cwd, 'content', '_reports', 'content_gap_report.json');
@@ -45,6 +54,75 @@ function readJson(filePath) {
   return JSON.parse(fs.readFileSync(filePath, 'utf8'));
 }
 
+// NDJSON outlines (`extract_epub_outline.py --format ndjson`) hold a header record,
+// one record per chapter and a closing summary; each line is parsed on its own.
+function readNdjsonOutline(text) {
+  const outline = { chapters: [] };
+  text.split('\n').forEach((line) => {
+    if (!line.trim()) return;
+    const { record, ...fields } = JSON.parse(line);
+    if (record === 'header') Object.assign(outline, fields);
+    if (record === 'chapter') outline.chapters.push(fields);
+  });
+  return outline;
+}
+
+// `--format ndjson` may write to any path, so the format is told from the first record rather
+// than the file name. An indented JSON outline's first line is just "{" and never parses alone.
+function isNdjsonOutline(text) {
+  const newline = text.indexOf('\n');
+  try {
+    return JSON.parse(newline === -1 ? text : text.slice(0, newline))?.record === 'header';
+  } catch {
+    return false;
+  }
+}
+
+function readOutline(filePath) {
+  const bytes = fs.readFileSync(filePath);
+  // Binary chapters are decoded lazily, one per iteration step, instead of all up front.
+  if (isOutlineBinary(bytes)) {
+    const binary = openOutlineBinary(bytes);
+    return { ...binary.header, chapters: binary.chapters() };
+  }
+  const text = bytes.toString('utf8');
+  return isNdjsonOutline(text) ? readNdjsonOutline(text) : JSON.parse(text);
+}
+
+// Outlines written before `--hash` existed carry no hash_algorithm; they were hashed with SHA-256.
+function outlineHashAlgorithm(outline) {
+  return outline.hash_algorithm ?? 'sha256';
+}
+
+// Only `--outline-source toc` outlines record the field; everything else was read from the body.
+function outlineSource(outline) {
+  return outline.outline_source ?? 'body';
+}
+
+function buildPreviousSectionHashes(previousOutline, outline) {
+  const previousAlgorithm = outlineHashAlgorithm(previousOutline);
+  const currentAlgorithm = outlineHashAlgorithm(outline);
+  if (previousAlgorithm !== currentAlgorithm) {
+    throw new Error(
+      `Cannot compare outline hashes across algorithms (${previousAlgorithm} in ${previousOutlinePath}, ` +
+      `${currentAlgorithm} in ${outlinePath}). Re-extract both outlines with the same --hash.`
+    );
+  }
+  const previousSource = outlineSource(previousOutline);
+  const currentSource = outlineSource(outline);
+  if (previousSource !== currentSource) {
+    throw new Error(
+      `Cannot compare outlines across outline sources (${previousSource} in ${previousOutlinePath}, ` +
+      `${currentSource} in ${outlinePath}). Re-extract both outlines with the same --outline-source.`
+    );
+  }
+  const hashes = new Map();
+  for (const chapter of previousOutline.chapters ?? []) {
+    (chapter.sections ?? []).forEach((section) => hashes.set(section.href, section.hash));
+  }
+  return hashes;
+}
+
 function normalizeText(value) {
   return String(value ?? '')
     .toLowerCase()
@@ -198,7 +276,13 @@ function buildReport() {
   if (!fs.existsSync(packsDir)) throw new Error(`Packs directory missing: ${packsDir}`);
   if (!fs.existsSync(lessonsDir)) throw new Error(`Lessons directory missing: ${lessonsDir}`);
 
-  const outline = readJson(outlinePath);
+  const outline = readOutline(outlinePath);
+  if (previousOutlinePath && !fs.existsSync(previousOutlinePath)) {
+    throw new Error(`Previous outline not found: ${previousOutlinePath}`);
+  }
+  const previousHashes = previousOutlinePath
+    ? buildPreviousSectionHashes(readOutline(previousOutlinePath), outline)
+    : null;
   const packFiles = getPackFiles();
   const lessonFiles = getLessonFiles();
 
@@ -213,12 +297,14 @@ function buildReport() {
   });
 
   const lessonByPackId = new Map(lessons.map((lesson) => [lesson.pack_id, lesson]));
-  const chapters = Array.isArray(outline.chapters) ? outline.chapters : [];
+  const chapters = outline.chapters ?? [];
 
   const chapterRows = [];
   const gapRows = [];
 
-  chapters.forEach((outlineChapter, chapterIndex) => {
+  let chapterIndex = -1;
+  for (const outlineChapter of chapters) {
+    chapterIndex += 1;
     const chapterOrder = chapterIndex + 1;
     const { inferredNumber, pack } = buildChapterMapping(outlineChapter, chapterIndex, packsSorted);
     const lesson = pack ? lessonByPackId.get(pack.pack_id) : null;
@@ -238,6 +324,9 @@ function buildReport() {
         evidence: evalRow.evidence,
         reasons: evalRow.reasons
       };
+      if (previousHashes) {
+        sectionRow.changed = !previousHashes.has(section.href) || previousHashes.get(section.href) !== section.hash;
+      }
       if (evalRow.status !== 'covered') {
         gapRows.push({
           chapter_order: chapterOrder,
@@ -305,7 +394,7 @@ function buildReport() {
       },
       sections: sectionRows
     });
-  });
+  }
 
   const missingChapters = chapterRows.filter((chapter) => chapter.status === 'missing');
   const weakChapters = chapterRows.filter((chapter) => chapter.status === 'weak');
@@ -322,13 +411,23 @@ function buildReport() {
   return {
     generated_at: new Date().toISOString(),
     source_outline: path.relative(cwd, outlinePath),
+    hash_algorithm: outlineHashAlgorithm(outline),
+    ...(previousOutlinePath ? { previous_outline: path.relative(cwd, previousOutlinePath) } : {}),
     summary: {
       chapters_total: chapterRows.length,
       chapters_missing: missingChapters.length,
       chapters_weak: weakChapters.length,
       sections_total: chapterRows.reduce((sum, chapter) => sum + chapter.coverage.sections_total, 0),
       sections_missing: missingSections.length,
-      sections_weak: weakSections.length
+      sections_weak: weakSections.length,
+      ...(previousHashes
+        ? {
+          sections_changed: chapterRows.reduce(
+            (sum, chapter) => sum + chapter.sections.filter((section) => section.changed).length,
+            0
+          )
+        }
+        : {})
     },
     chapters: chapterRows,
     top_gaps: gapRows.slice(0, 50)
@@ -343,6 +442,9 @@ function printSummary(report) {
   console.log(`Sections total: ${report.summary.sections_total}`);
   console.log(`Sections missing: ${report.summary.sections_missing}`);
   console.log(`Sections weak: ${report.summary.sections_weak}`);
+  if (report.summary.sections_changed !== undefined) {
+    console.log(`Sections changed since ${report.previous_outline}: ${report.summary.sections_changed}`);
+  }
 
   if (report.top_gaps.length === 0) {
     console.log('No missing/weak gaps detected.');
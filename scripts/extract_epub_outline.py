@@ -7,28 +7,271 @@ This script intentionally avoids exporting chapter text. It emits only:
 - href links
 - word counts
 - stable hashes
+
+Besides the command line, the module is importable from other Python tooling:
+
+    import extract_epub_outline as outline
+
+    for chapter in outline.iter_outline("book.epub", engine="expat", jobs=4):
+        print(chapter.order, chapter.title, len(chapter.sections))
+
+    doc = outline.build_outline(epub_bytes)  # the same dict the CLI writes as JSON
+
+Both accept a path, an open binary file or the EPUB bytes. iter_outline yields
+ChapterRecord objects as spine documents are parsed (to_dict() gives the JSON shape);
+build_outline collects them into the JSON document without touching the disk.
 """
 
 from __future__ import annotations
 
 import argparse
+import codecs
+import contextlib
+import functools
+import glob
 import hashlib
+import html
+import io
 import json
+import mmap
+import os
 import posixpath
 import re
+import shutil
+import signal
+import sqlite3
+import struct
 import sys
+import tempfile
+import threading
+import time
 import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
+from html.entities import html5 as HTML5_ENTITIES
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from xml.etree import ElementTree as ET
+from xml.parsers import expat
 
 
 WORD_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?")
-WS_RE = re.compile(r"\s+")
 CHAPTER_RE = re.compile(r"\bchapter\s*0*(\d{1,3})\b", re.IGNORECASE)
 CH_RE = re.compile(r"\bch(?:apter)?[_\-\s]*0*(\d{1,3})\b", re.IGNORECASE)
+# html.unescape maps these numeric references through cp1252; expat does not.
+CP1252_CHARREF_RE = re.compile(rb"&#(?:0*(?:12[89]|1[3-5]\d)|[xX]0*[89][0-9a-fA-F]);")
+
+LOADER_ENGINES = ("ebooklib", "zip_fallback")
+PARSER_ENGINES = ("html", "expat")
+OUTLINE_SOURCES = ("body", "toc")
+XML_PREDEFINED_ENTITIES = {"amp", "lt", "gt", "quot", "apos"}
+ENTITY_REF_RE = re.compile(rb"&([A-Za-z][A-Za-z0-9]*);")
+
+# Spine documents are decoded and fed to the parser in chunks of this many bytes.
+FEED_CHUNK_BYTES = 64 * 1024
+
+# Body text is hashed in batches of roughly this many characters instead of per text node.
+DIGEST_BATCH_CHARS = 64 * 1024
+
+# Digests behind section/chapter hashes (--hash). Outlines record a label such as "sha256"
+# or "blake2b-256" in hash_algorithm; hashes are only comparable under the same label.
+HASH_ALGORITHMS = ("sha256", "blake2b")
+DEFAULT_HASH_ALGORITHM = "sha256"
+BLAKE2B_DIGEST_SIZES = range(8, 65)
+
+# Bump whenever parse_document output changes so cached chapter records are discarded.
+PARSER_VERSION = 1
+
+# Section sketches (--sketch): 64-bit SimHash over 2-word shingles. The LSH index splits a
+# sketch into SIMHASH_BANDS bands, so two sketches within SIMHASH_BANDS - 1 differing bits
+# always share a band and pairs up to SIMHASH_MAX_DISTANCE apart usually do (about 90% at
+# 10 bits). Unrelated sections land around 32 bits apart.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+SIMHASH_MAX_DISTANCE = 10
+SIMHASH_MASK = (1 << SIMHASH_BITS) - 1
+# SIMHASH_BIT_TABLES[j] maps a byte to 1 when bit j is set, so bytes.translate counts a bit column.
+SIMHASH_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+# --binary-output layout; see BinaryOutlineWriter. Record widths exclude the trailing raw hash.
+# scripts/outline_binary.mjs reads the same layout; keep its field offsets in step with these.
+BINARY_MAGIC = b"EPOB"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHIIHHIIIIII")
+BINARY_CHAPTER = struct.Struct("<IiIIIIIII")
+BINARY_SECTION = struct.Struct("<IIBxxxIIIII")
+# Stored in a word_count field when the outline has no count (--outline-source toc).
+BINARY_NO_WORD_COUNT = 0xFFFFFFFF
+
+
+@dataclass(frozen=True)
+class ParseOptions:
+    """Per-document parse settings; picklable so workers receive the same configuration."""
+
+    engine: str = "html"
+    profile: bool = False
+    sketch: bool = False
+    # Per-document guards; None disables. Documents that hit one are kept, marked incomplete.
+    max_document_bytes: Optional[int] = None
+    max_document_cpu_s: Optional[float] = None
+    hash_algorithm: str = DEFAULT_HASH_ALGORITHM
+
+    @property
+    def cache_variant(self) -> str:
+        variant = f"{self.engine}+sketch" if self.sketch else self.engine
+        if self.hash_algorithm != DEFAULT_HASH_ALGORITHM:
+            variant = f"{variant}+{self.hash_algorithm}"
+        return variant
+
+
+class PhaseProfiler:
+    """Accumulates wall time, CPU time and bytes per extraction phase and per spine document."""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.documents: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    @staticmethod
+    def _add(target: Dict[str, Dict[str, float]], name: str, sample: Dict[str, float]) -> None:
+        totals = target.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "bytes": 0})
+        for field, value in sample.items():
+            totals[field] += value
+
+    @contextlib.contextmanager
+    def phase(self, name: str, nbytes: int = 0, document: Optional[str] = None) -> Iterator[None]:
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            sample = {
+                "calls": 1,
+                "wall_s": time.perf_counter() - wall_started,
+                "cpu_s": time.process_time() - cpu_started,
+                "bytes": nbytes,
+            }
+            self._add(self.phases, name, sample)
+            if document is not None:
+                self._add(self.documents.setdefault(document, {}), name, sample)
+
+    def merge_document(self, document: str, phases: Dict[str, Dict[str, float]]) -> None:
+        """Fold in per-document phases measured elsewhere, e.g. in a pool worker."""
+        for name, sample in phases.items():
+            self._add(self.phases, name, sample)
+            self._add(self.documents.setdefault(document, {}), name, sample)
+
+    def as_dict(self) -> Dict[str, object]:
+        def rounded(phases: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+            return {
+                name: {field: round(value, 6) if isinstance(value, float) else value for field, value in totals.items()}
+                for name, totals in phases.items()
+            }
+
+        return {
+            "phases": rounded(self.phases),
+            "documents": [{"href": href, "phases": rounded(phases)} for href, phases in self.documents.items()],
+        }
+
+    def summary(self) -> str:
+        """Per-phase totals, slowest first, as printed to stderr by --profile."""
+        rows = sorted(self.phases.items(), key=lambda item: item[1]["wall_s"], reverse=True)
+        return "\n".join(
+            ["Profile (all phases, including json_dumps):"]
+            + [
+                f"  {name}: {totals['wall_s']:.4f}s wall, {totals['cpu_s']:.4f}s CPU, "
+                f"{int(totals['calls'])} calls, {int(totals['bytes'])} bytes"
+                for name, totals in rows
+            ]
+        )
+
+
+_ACTIVE_PROFILER: Optional[PhaseProfiler] = None
+
+
+@contextlib.contextmanager
+def activate_profiler(profiler: Optional[PhaseProfiler]) -> Iterator[None]:
+    global _ACTIVE_PROFILER
+    previous = _ACTIVE_PROFILER
+    _ACTIVE_PROFILER = profiler
+    try:
+        yield
+    finally:
+        _ACTIVE_PROFILER = previous
+
+
+@contextlib.contextmanager
+def profile_phase(name: str, nbytes: int = 0, document: Optional[str] = None) -> Iterator[None]:
+    """Time a phase against the active profiler; a no-op when profiling is off."""
+    if _ACTIVE_PROFILER is None:
+        yield
+        return
+    with _ACTIVE_PROFILER.phase(name, nbytes=nbytes, document=document):
+        yield
+
+
+def html_entity_dtd(content: bytes) -> str:
+    """Declare the HTML named entities used in content so expat accepts &nbsp; and friends."""
+    declarations = []
+    names = {name.decode("ascii") for name in ENTITY_REF_RE.findall(content)}
+    for name in sorted(names - XML_PREDEFINED_ENTITIES):
+        value = HTML5_ENTITIES.get(f"{name};")
+        if value is not None:
+            declarations.append(f'<!ENTITY {name} "{"".join(f"&#{ord(char)};" for char in value)}">')
+    return "".join(declarations)
+
+
+class DocumentLimitExceeded(Exception):
+    """Raised inside a parse when a document runs past a ParseOptions guard."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+@contextlib.contextmanager
+def document_cpu_limit(seconds: Optional[float]) -> Iterator[None]:
+    """Interrupt the block with DocumentLimitExceeded after `seconds` of process CPU time.
+
+    Uses ITIMER_PROF, so it can stop a parse stuck inside a single chunk. The timer only
+    works on the main thread of a POSIX process, which covers serial runs and pool
+    workers; elsewhere this is a no-op and the per-chunk check in run_outline_parser
+    is the only guard.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_limit(_signum: int, _frame: object) -> None:
+        raise DocumentLimitExceeded("cpu_time")
+
+    previous = signal.signal(signal.SIGPROF, on_limit)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def iter_decoded_chunks(content: bytes, chunk_bytes: int = FEED_CHUNK_BYTES) -> Iterator[Tuple[int, str]]:
+    """Decode UTF-8 in fixed-size slices; yields (bytes consumed so far, text).
+
+    The incremental decoder carries a multi-byte sequence split across slices over to
+    the next one, so the text matches a one-shot decode with errors="ignore".
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    view = memoryview(content)
+    for start in range(0, len(view), chunk_bytes):
+        end = min(start + chunk_bytes, len(view))
+        text = decoder.decode(view[start:end])
+        if text:
+            yield end, text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield len(view), tail
 
 
 def now_iso() -> str:
@@ -36,30 +279,226 @@ def now_iso() -> str:
 
 
 def normalize_space(value: str) -> str:
-    return WS_RE.sub(" ", value).strip()
+    # str.split() uses the same Unicode whitespace set as re's \s, without a regex pass.
+    return " ".join(value.split())
 
 
 def count_words(value: str) -> int:
     return len(WORD_RE.findall(value))
 
 
-def stable_hash(*parts: str) -> str:
-    digest = hashlib.sha256()
+def hash_algorithm_label(name: str, digest_size: int = 32) -> str:
+    """Outline label for --hash NAME with a digest of digest_size bytes."""
+    return name if name == DEFAULT_HASH_ALGORITHM else f"{name}-{digest_size * 8}"
+
+
+_DIGEST_FACTORIES: Dict[str, Callable[[], "hashlib._Hash"]] = {DEFAULT_HASH_ALGORITHM: hashlib.sha256}
+
+
+def digest_factory(algorithm: str) -> Callable[[], "hashlib._Hash"]:
+    """Return a constructor for the digest named by an outline hash_algorithm label."""
+    factory = _DIGEST_FACTORIES.get(algorithm)
+    if factory is None:
+        name, _, bits = algorithm.partition("-")
+        if name != "blake2b" or not bits.isdigit() or int(bits) % 8 or int(bits) // 8 not in BLAKE2B_DIGEST_SIZES:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+        factory = functools.partial(hashlib.blake2b, digest_size=int(bits) // 8)
+        _DIGEST_FACTORIES[algorithm] = factory
+    return factory
+
+
+def outline_hash_algorithm(outline: Dict[str, object]) -> str:
+    # Outlines written before --hash existed carry no label; they were hashed with SHA-256.
+    return str(outline.get("hash_algorithm") or DEFAULT_HASH_ALGORITHM)
+
+
+def outline_source_of(outline: Dict[str, object]) -> str:
+    # Only --outline-source toc outlines record the field; everything else was read from the body.
+    return str(outline.get("outline_source") or "body")
+
+
+def stable_hash(*parts: str, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    digest = digest_factory(algorithm)()
     for part in parts:
         digest.update(part.encode("utf-8"))
         digest.update(b"\x1f")
     return digest.hexdigest()
 
 
-def file_sha256(file_path: Path) -> str:
-    digest = hashlib.sha256()
-    with file_path.open("rb") as handle:
-        while True:
-            chunk = handle.read(1024 * 64)
-            if not chunk:
-                break
-            digest.update(chunk)
-    return digest.hexdigest()
+_WORD_HASHES: Dict[str, int] = {}
+
+
+def word_hash(word: str) -> int:
+    """Stable 64-bit hash of a case-folded word, memoized per process."""
+    value = _WORD_HASHES.get(word)
+    if value is None:
+        value = int.from_bytes(hashlib.blake2b(word.casefold().encode("utf-8"), digest_size=8).digest(), "little")
+        _WORD_HASHES[word] = value
+    return value
+
+
+def simhash64(features: List[int]) -> int:
+    """SimHash of 64-bit feature hashes: bit b is set when most features have bit b set.
+
+    The features are packed into bytes once and every bit column is counted with
+    bytes.translate, so the cost is 64 C-level passes rather than 64 steps per feature.
+    """
+    if not features:
+        return 0
+    packed = struct.pack(f"<{len(features)}Q", *features)
+    threshold = len(features) / 2
+    result = 0
+    for byte_index in range(8):
+        column = packed[byte_index::8]
+        for bit, table in enumerate(SIMHASH_BIT_TABLES):
+            if column.translate(table).count(1) > threshold:
+                result |= 1 << (byte_index * 8 + bit)
+    return result
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - resource is POSIX-only
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class CountingReader(io.RawIOBase):
+    """Seekable read-only view over a shared buffer that tallies bytes read per phase."""
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], counters: Dict[str, int], phase: str) -> None:
+        super().__init__()
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._pos = 0
+        self._counters = counters
+        self._phase = phase
+        counters.setdefault(phase, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target: bytearray) -> int:  # type: ignore[override]
+        chunk = self._view[self._pos : self._pos + len(target)]
+        size = len(chunk)
+        target[:size] = chunk
+        self._pos += size
+        self._counters[self._phase] += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+# Anything iter_outline/build_outline can read an EPUB from. An already open EpubSource is
+# used as it is and left open, so a caller that hashed it first does not map it twice.
+EpubSourceInput = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO, "EpubSource"]
+
+
+class EpubSource:
+    """Maps an EPUB once and shares the mapping between the zip readers and the hasher.
+
+    Paths are memory-mapped. In-memory bytes are used as they are, and a binary file
+    object is read to the end; the caller keeps ownership of it.
+    """
+
+    def __init__(self, epub: EpubSourceInput) -> None:
+        self._input = epub
+        self.path: Optional[Path] = None
+        if isinstance(epub, (str, os.PathLike)):
+            self.path = Path(epub)
+        self.bytes_read: Dict[str, int] = {}
+        self._handle: Optional[BinaryIO] = None
+        self._buffer: Union[mmap.mmap, bytes] = b""
+        self._readers: List[CountingReader] = []
+        self._sha256: Optional[str] = None
+
+    def __enter__(self) -> "EpubSource":
+        if self.path is None:
+            if isinstance(self._input, (bytes, bytearray, memoryview)):
+                self._buffer = bytes(self._input)
+            else:
+                self._buffer = self._input.read()  # type: ignore[union-attr]
+            return self
+        self._handle = self.path.open("rb")
+        try:
+            self._buffer = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            self._buffer = self._handle.read()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        # Readers export views of the mapping, which must be released before it closes.
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    @property
+    def name(self) -> str:
+        """What the outline records as source_epub."""
+        if self.path is not None:
+            return str(self.path)
+        if isinstance(self._input, (bytes, bytearray, memoryview)):
+            return "<bytes>"
+        return str(getattr(self._input, "name", "<stream>"))
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def reader(self, phase: str) -> CountingReader:
+        reader = CountingReader(self._buffer, self.bytes_read, phase)
+        self._readers.append(reader)
+        return reader
+
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            with profile_phase("sha256", nbytes=self.size):
+                self._sha256 = self._digest()
+        return self._sha256
+
+    def _digest(self) -> str:
+        digest = hashlib.sha256()
+        view = memoryview(self._buffer)
+        step = 1024 * 1024
+        for start in range(0, len(view), step):
+            digest.update(view[start : start + step])
+        view.release()
+        self.bytes_read["sha256"] = self.bytes_read.get("sha256", 0) + self.size
+        return digest.hexdigest()
+
+
+def write_text_atomic(file_path: Path, text: str) -> None:
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, file_path)
 
 
 def slug_to_title(value: str) -> str:
@@ -79,20 +518,132 @@ def infer_chapter_number(title: str, href: str, fallback_order: int) -> int:
     return fallback_order
 
 
+@dataclass(slots=True)
+class HeadingRecord:
+    """A heading as the parser sees it, before chapter/section splitting."""
+
+    order: int
+    level: int
+    title: str
+    word_count: int = 0
+    simhash: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SectionRecord:
+    order: int
+    level: int
+    title: str
+    href: str
+    # None when the outline came from the TOC without word counts.
+    word_count: Optional[int]
+    hash: str
+    simhash: Optional[str] = None
+
+    def to_dict(self, with_simhash: bool = False) -> Dict[str, object]:
+        record: Dict[str, object] = {
+            "order": self.order,
+            "level": self.level,
+            "title": self.title,
+            "href": self.href,
+            "word_count": self.word_count,
+            "hash": self.hash,
+        }
+        if with_simhash:
+            record["simhash"] = self.simhash
+        return record
+
+
+@dataclass(slots=True)
+class ChapterRecord:
+    """In-memory chapter row; to_dict() is the single step that produces the JSON shape.
+
+    Slotted records keep tens of thousands of sections compact while they travel from
+    the parser through worker pools and the cache to the writers.
+    """
+
+    order: int
+    chapter_number: Optional[int]
+    href: str
+    title: str
+    word_count: Optional[int]
+    hash: str
+    sections: List[SectionRecord]
+    # Only recorded for non-default engines, to keep html outlines unchanged.
+    parser_engine: Optional[str] = None
+    incomplete: Optional[Dict[str, object]] = None
+    # Whether sections carry a "simhash" key (None is a valid sketch for empty sections).
+    sketched: bool = False
+
+    def to_dict(self) -> Dict[str, object]:
+        record: Dict[str, object] = {
+            "order": self.order,
+            "chapter_number": self.chapter_number,
+            "href": self.href,
+            "title": self.title,
+            "word_count": self.word_count,
+            "hash": self.hash,
+        }
+        if self.parser_engine is not None:
+            record["parser_engine"] = self.parser_engine
+        if self.incomplete is not None:
+            record["incomplete"] = self.incomplete
+        record["sections"] = [section.to_dict(self.sketched) for section in self.sections]
+        return record
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, object]) -> "ChapterRecord":
+        rows: List[Dict[str, object]] = record["sections"]  # type: ignore[assignment]
+        return cls(
+            order=int(record["order"]),  # type: ignore[call-overload]
+            chapter_number=record.get("chapter_number"),  # type: ignore[arg-type]
+            href=str(record["href"]),
+            title=str(record["title"]),
+            word_count=record["word_count"],  # type: ignore[arg-type]
+            hash=str(record["hash"]),
+            sections=[
+                SectionRecord(
+                    order=row["order"],  # type: ignore[arg-type]
+                    level=row["level"],  # type: ignore[arg-type]
+                    title=row["title"],  # type: ignore[arg-type]
+                    href=row["href"],  # type: ignore[arg-type]
+                    word_count=row["word_count"],  # type: ignore[arg-type]
+                    hash=row["hash"],  # type: ignore[arg-type]
+                    simhash=row.get("simhash"),  # type: ignore[arg-type]
+                )
+                for row in rows
+            ],
+            parser_engine=record.get("parser_engine"),  # type: ignore[arg-type]
+            incomplete=record.get("incomplete"),  # type: ignore[arg-type]
+            sketched=any("simhash" in row for row in rows),
+        )
+
+
 class OutlineParser(HTMLParser):
     """Captures heading structure and word counts without storing full text."""
 
-    def __init__(self) -> None:
+    def __init__(self, sketch: bool = False, hash_algorithm: str = DEFAULT_HASH_ALGORITHM) -> None:
         super().__init__(convert_charrefs=True)
-        self.sections: List[Dict[str, object]] = []
+        self.sections: List[HeadingRecord] = []
         self.total_word_count = 0
         self._in_title = False
         self._skip_depth = 0
         self._title_parts: List[str] = []
         self._heading_level: Optional[int] = None
         self._heading_parts: List[str] = []
-        self._active_section_index: Optional[int] = None
-        self._content_digest = hashlib.sha256()
+        self._active_section: Optional[HeadingRecord] = None
+        self._content_digest = digest_factory(hash_algorithm)()
+        self._digest_parts: List[str] = []
+        self._digest_pending = 0
+        # Only word hashes reach the sketch; section text is never retained.
+        self._sketch = sketch
+        self._shingles: List[int] = []
+        self._shingle_window: List[int] = []
+        # The latest text node is held back one event: when feed() returns right after
+        # it, the next chunk may continue the same run of text, and HTMLParser would
+        # report the two halves separately.
+        self._deferred_text: Optional[str] = None
+        self._text_may_continue = False
 
     @property
     def document_title(self) -> str:
@@ -100,21 +651,86 @@ class OutlineParser(HTMLParser):
 
     @property
     def content_hash(self) -> str:
+        self._flush_digest()
         return self._content_digest.hexdigest()
 
+    def _flush_digest(self) -> None:
+        # Hashing "a\nb\n" in one update is identical to hashing "a\n" then "b\n".
+        if not self._digest_parts:
+            return
+        self._content_digest.update("\n".join(self._digest_parts).encode("utf-8"))
+        self._content_digest.update(b"\n")
+        self._digest_parts.clear()
+        self._digest_pending = 0
+
+    def _close_sketch(self) -> None:
+        """Store the SimHash of the active section's body and start a new shingle run."""
+        if self._active_section is not None:
+            features = self._shingles or self._shingle_window
+            self._active_section.simhash = f"{simhash64(features):016x}" if features else None
+        self._shingles = []
+        self._shingle_window = []
+
+    def finish_sketches(self) -> None:
+        if self._sketch:
+            self._close_sketch()
+
+    def _add_shingles(self, tokens: List[str]) -> None:
+        known = _WORD_HASHES.get
+        hashes = self._shingle_window + [known(token) or word_hash(token) for token in tokens]
+        # Rotate the first word so "a b" and "b a" are different shingles.
+        self._shingles.extend(
+            [(((first << 1) | (first >> 63)) ^ second) & SIMHASH_MASK for first, second in zip(hashes, hashes[1:])]
+        )
+        self._shingle_window = hashes[-1:]
+
     def _record_word_chunk(self, chunk: str) -> None:
-        words = count_words(chunk)
+        if self._sketch:
+            tokens = WORD_RE.findall(chunk)
+            words = len(tokens)
+        else:
+            words = count_words(chunk)
         if words == 0:
             return
         self.total_word_count += words
-        self._content_digest.update(chunk.encode("utf-8"))
-        self._content_digest.update(b"\n")
-        if self._heading_level is None and self._active_section_index is not None:
-            self.sections[self._active_section_index]["word_count"] = (
-                int(self.sections[self._active_section_index]["word_count"]) + words
-            )
+        self._digest_parts.append(chunk)
+        self._digest_pending += len(chunk) + 1
+        if self._digest_pending >= DIGEST_BATCH_CHARS:
+            self._flush_digest()
+        if self._heading_level is None and self._active_section is not None:
+            self._active_section.word_count += words
+            if self._sketch:
+                self._add_shingles(tokens)
+
+    def feed_chunk(self, chunk: str) -> None:
+        self.feed(chunk)
+        self._text_may_continue = self._deferred_text is not None
+
+    def close(self) -> None:
+        super().close()
+        self._flush_text()
+
+    def _flush_text(self) -> None:
+        deferred = self._deferred_text
+        if deferred is not None:
+            self._deferred_text = None
+            self._text_may_continue = False
+            self._consume_text(deferred)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_text()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush_text()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush_text()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush_text()
 
     def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush_text()
         lower = tag.lower()
         if lower in {"script", "style"}:
             self._skip_depth += 1
@@ -127,6 +743,7 @@ class OutlineParser(HTMLParser):
             self._heading_parts = []
 
     def handle_endtag(self, tag: str) -> None:
+        self._flush_text()
         lower = tag.lower()
         if lower in {"script", "style"}:
             if self._skip_depth > 0:
@@ -144,20 +761,26 @@ class OutlineParser(HTMLParser):
         ):
             heading_title = normalize_space(" ".join(self._heading_parts))
             if heading_title:
-                self.sections.append(
-                    {
-                        "order": len(self.sections) + 1,
-                        "level": self._heading_level,
-                        "title": heading_title,
-                        "word_count": 0,
-                    }
-                )
-                self._active_section_index = len(self.sections) - 1
+                if self._sketch:
+                    self._close_sketch()
+                self._active_section = HeadingRecord(len(self.sections) + 1, self._heading_level, heading_title)
+                self.sections.append(self._active_section)
             self._heading_level = None
             self._heading_parts = []
 
     def handle_data(self, data: str) -> None:
-        if self._skip_depth > 0:
+        deferred = self._deferred_text
+        if deferred is not None:
+            if self._text_may_continue:
+                data = deferred + data
+            else:
+                self._consume_text(deferred)
+        self._deferred_text = data
+        self._text_may_continue = False
+
+    def _consume_text(self, data: str) -> None:
+        # Whitespace-only nodes between tags are the common case; reject them without allocating.
+        if self._skip_depth > 0 or not data or data.isspace():
             return
         chunk = normalize_space(data)
         if not chunk:
@@ -168,231 +791,2204 @@ class OutlineParser(HTMLParser):
         if self._heading_level is not None:
             self._heading_parts.append(chunk)
 
+    def feed_xml(self, chunks: Iterable[str], entity_dtd: str = "") -> None:
+        """Drive the same handlers from expat; raises expat.ExpatError on malformed XML.
 
-def parse_document(order: int, href: str, content_bytes: bytes) -> Dict[str, object]:
-    parser = OutlineParser()
-    try:
-        parser.feed(content_bytes.decode("utf-8", errors="ignore"))
-        parser.close()
-    except Exception:
-        # Keep extraction resilient for malformed XHTML chunks.
-        pass
+        HTMLParser reports all text between two markup tokens as one chunk, while expat
+        splits character data freely, so text is buffered and flushed at every token to
+        keep word counts and the content digest identical. entity_dtd declares the HTML
+        named entities the document uses (see html_entity_dtd).
+        """
+        xml_parser = expat.ParserCreate(encoding="utf-8")
+        buffer: List[str] = []
+        in_cdata = False
+
+        def flush() -> None:
+            if buffer:
+                self.handle_data("".join(buffer))
+                buffer.clear()
+
+        def start_element(name: str, attrs: Dict[str, str]) -> None:
+            flush()
+            # HTMLParser treats script/style bodies as raw text, so nested markup is inert.
+            if self._skip_depth > 0 and name.lower() not in {"script", "style"}:
+                return
+            self.handle_starttag(name, list(attrs.items()))
+
+        def end_element(name: str) -> None:
+            flush()
+            if self._skip_depth > 0 and name.lower() not in {"script", "style"}:
+                return
+            self.handle_endtag(name)
+
+        def character_data(data: str) -> None:
+            # HTMLParser ignores CDATA marked sections outside script/style.
+            if not in_cdata or self._skip_depth > 0:
+                buffer.append(data)
+
+        def start_cdata() -> None:
+            nonlocal in_cdata
+            flush()
+            in_cdata = True
+
+        def end_cdata() -> None:
+            nonlocal in_cdata
+            flush()
+            in_cdata = False
+
+        def skipped_entity(name: str, _is_parameter: bool) -> None:
+            buffer.append(html.unescape(f"&{name};"))
+
+        def external_entity(context: Optional[str], *_ids: Optional[str]) -> int:
+            entity_parser = xml_parser.ExternalEntityParserCreate(context)
+            entity_parser.Parse(entity_dtd, True)
+            return 1
+
+        xml_parser.StartElementHandler = start_element
+        xml_parser.EndElementHandler = end_element
+        xml_parser.CharacterDataHandler = character_data
+        xml_parser.StartCdataSectionHandler = start_cdata
+        xml_parser.EndCdataSectionHandler = end_cdata
+        xml_parser.CommentHandler = lambda _data: flush()
+        xml_parser.ProcessingInstructionHandler = lambda _target, _data: flush()
+        xml_parser.SkippedEntityHandler = skipped_entity
+        if entity_dtd:
+            xml_parser.ExternalEntityRefHandler = external_entity
+            xml_parser.SetParamEntityParsing(expat.XML_PARAM_ENTITY_PARSING_UNLESS_STANDALONE)
+            xml_parser.UseForeignDTD(True)
+        for chunk in chunks:
+            xml_parser.Parse(chunk, False)
+        xml_parser.Parse("", True)
+        flush()
+        self._flush_text()
+
+
+def run_outline_parser(
+    content_bytes: bytes,
+    options: Optional[ParseOptions] = None,
+    make_parser: Optional[Callable[[], OutlineParser]] = None,
+) -> Tuple[OutlineParser, str, Optional[Dict[str, object]]]:
+    """Parse a spine document in decoded chunks, honouring the per-document guards.
+
+    Returns the parser, the engine that produced it and, when the document was not
+    parsed to the end, an "incomplete" record saying why and how far parsing got. The
+    expat engine falls back to HTMLParser for malformed XML and for truncated input.
+    make_parser builds the parser (and its replacement after an expat fallback); the
+    default is a plain OutlineParser for the options.
+    """
+    options = options or ParseOptions()
+    if make_parser is None:
+        make_parser = functools.partial(OutlineParser, sketch=options.sketch, hash_algorithm=options.hash_algorithm)
+    total_bytes = len(content_bytes)
+    limit = options.max_document_bytes
+    incomplete: Optional[Dict[str, object]] = None
+    if limit and total_bytes > limit:
+        content_bytes = content_bytes[:limit]
+        incomplete = {"reason": "max_bytes", "parsed_bytes": limit, "total_bytes": total_bytes}
+
+    parsed_bytes = 0
+    cpu_limit = options.max_document_cpu_s
+    started = time.process_time()
+
+    def chunks() -> Iterator[str]:
+        nonlocal parsed_bytes
+        for consumed, text in iter_decoded_chunks(content_bytes):
+            if cpu_limit and time.process_time() - started > cpu_limit:
+                raise DocumentLimitExceeded("cpu_time")
+            yield text
+            parsed_bytes = consumed
+
+    def stopped(reason: str, **detail: object) -> Dict[str, object]:
+        return {"reason": reason, "parsed_bytes": parsed_bytes, "total_bytes": total_bytes, **detail}
+
+    parser = make_parser()
+    engine_used = "html"
+    with document_cpu_limit(cpu_limit):
+        try:
+            if options.engine == "expat" and incomplete is None and not CP1252_CHARREF_RE.search(content_bytes):
+                engine_used = "expat"
+                try:
+                    parser.feed_xml(chunks(), html_entity_dtd(content_bytes) if b"&" in content_bytes else "")
+                    parser.finish_sketches()
+                    return parser, engine_used, None
+                except expat.ExpatError:
+                    parser = make_parser()
+                    engine_used = "html"
+                    parsed_bytes = 0
+
+            try:
+                for chunk in chunks():
+                    parser.feed_chunk(chunk)
+                parser.close()
+            except DocumentLimitExceeded:
+                raise
+            except Exception as exc:
+                # Keep extraction resilient for malformed XHTML, but say where it stopped.
+                incomplete = stopped("parse_error", error=str(exc))
+        except DocumentLimitExceeded as exc:
+            incomplete = stopped(exc.reason)
+    parser.finish_sketches()
+    return parser, engine_used, incomplete
+
+
+def parse_document(
+    order: int, href: str, content_bytes: bytes, options: Optional[ParseOptions] = None
+) -> ChapterRecord:
+    options = options or ParseOptions()
+    # Decoding happens chunk by chunk inside the parse, so it is timed as part of it.
+    with profile_phase("parse", nbytes=len(content_bytes), document=href):
+        parser, parser_engine, incomplete = run_outline_parser(content_bytes, options)
 
     headings = parser.sections
-    first_heading = headings[0]["title"] if headings else ""
+    first_heading = headings[0].title if headings else ""
     chapter_title = first_heading or parser.document_title or slug_to_title(href)
 
     # If the first heading mirrors the chapter title, treat deeper headings as sections.
     section_rows = headings
     if headings:
-        first_level = int(headings[0]["level"])
-        if normalize_space(str(first_heading)).casefold() == normalize_space(chapter_title).casefold() and first_level <= 2:
+        if normalize_space(first_heading).casefold() == normalize_space(chapter_title).casefold() and headings[0].level <= 2:
             section_rows = headings[1:]
 
-    sections: List[Dict[str, object]] = []
-    for section_index, section in enumerate(section_rows, start=1):
-        level = int(section["level"])
-        title = str(section["title"])
-        word_count = int(section["word_count"])
-        sections.append(
-            {
-                "order": section_index,
-                "level": level,
-                "title": title,
-                "href": f"{href}#s{section_index}",
-                "word_count": word_count,
-                "hash": stable_hash(href, str(level), title, str(word_count)),
-            }
+    sections: List[SectionRecord] = []
+    with profile_phase("stable_hash", document=href):
+        for section_index, heading in enumerate(section_rows, start=1):
+            level, title, word_count = heading.level, heading.title, heading.word_count
+            sections.append(
+                SectionRecord(
+                    order=section_index,
+                    level=level,
+                    title=title,
+                    href=f"{href}#s{section_index}",
+                    word_count=word_count,
+                    hash=stable_hash(href, str(level), title, str(word_count), algorithm=options.hash_algorithm),
+                    simhash=heading.simhash,
+                )
+            )
+        chapter_hash = stable_hash(
+            href, chapter_title, str(parser.total_word_count), parser.content_hash, algorithm=options.hash_algorithm
         )
 
-    return {
-        "order": order,
-        "chapter_number": infer_chapter_number(chapter_title, href, order),
-        "href": href,
-        "title": chapter_title,
-        "word_count": parser.total_word_count,
-        "hash": stable_hash(href, chapter_title, str(parser.total_word_count), parser.content_hash),
-        "sections": sections,
-    }
+    return ChapterRecord(
+        order=order,
+        chapter_number=infer_chapter_number(chapter_title, href, order),
+        href=href,
+        title=chapter_title,
+        word_count=parser.total_word_count,
+        hash=chapter_hash,
+        sections=sections,
+        parser_engine=parser_engine if options.engine != "html" else None,
+        incomplete=incomplete,
+        sketched=options.sketch,
+    )
+
 
+def warn_incomplete(chapter: ChapterRecord) -> None:
+    incomplete = chapter.incomplete
+    if incomplete is not None:
+        print(
+            f"Incomplete parse of {chapter.href}: {incomplete['reason']} after "
+            f"{incomplete['parsed_bytes']} of {incomplete['total_bytes']} bytes",
+            file=sys.stderr,
+        )
+
+
+def assign_chapter_order(chapter: ChapterRecord, order: int) -> ChapterRecord:
+    """Set the final outline position, which also drives the chapter_number fallback."""
+    chapter.order = order
+    chapter.chapter_number = infer_chapter_number(chapter.title, chapter.href, order)
+    return chapter
+
+
+ParsedDocument = Tuple[ChapterRecord, Optional[Dict[str, Dict[str, float]]]]
+
+
+def _parse_unordered(href: str, content_bytes: bytes, options: ParseOptions) -> ParsedDocument:
+    # Ordering depends on which earlier documents were kept, so it is assigned by the caller.
+    if not options.profile:
+        return parse_document(order=0, href=href, content_bytes=content_bytes, options=options), None
+    # Profile into a local collector so pool workers can ship their timings back.
+    profiler = PhaseProfiler()
+    with activate_profiler(profiler):
+        chapter = parse_document(order=0, href=href, content_bytes=content_bytes, options=options)
+    return chapter, profiler.documents.get(href, {})
+
+
+def _ignore_sigint() -> None:
+    # Ctrl+C is the parent's to handle; it shuts the pool down, so workers need not print tracebacks.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def worker_pool(jobs: int) -> ProcessPoolExecutor:
+    """Process pool for spine parsing whose workers ignore SIGINT."""
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_ignore_sigint)
+
+
+def iter_parsed_documents(
+    spine_rows: Iterable[Tuple[int, str, bytes]],
+    jobs: int = 1,
+    cache: Optional[OutlineCache] = None,
+    member_keys: Optional[Dict[str, str]] = None,
+    options: Optional[ParseOptions] = None,
+    profiler: Optional[PhaseProfiler] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[ChapterRecord]:
+    """Parse unique spine documents, yielding unordered chapter records in spine order.
+
+    Pass ``executor`` to share one worker pool between several books; otherwise a pool
+    of ``jobs`` processes is created for this call when ``jobs`` is above one.
+    """
+    options = options or ParseOptions()
+    seen_hrefs = set()
+    keys = member_keys or {}
+
+    def unique_rows() -> Iterator[Tuple[str, bytes, Optional[ChapterRecord]]]:
+        for _order, href, content in spine_rows:
+            if href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            cached = cache.lookup(href, keys.get(href)) if cache is not None else None
+            yield href, content, cached
+
+    def remember(href: str, parsed: ParsedDocument) -> ChapterRecord:
+        chapter, timings = parsed
+        if profiler is not None and timings is not None:
+            profiler.merge_document(href, timings)
+        # Incomplete records depend on the guards in force, so they are never reused.
+        if cache is not None and chapter.incomplete is None:
+            cache.store(href, keys.get(href), chapter)
+        return chapter
+
+    if executor is None and jobs <= 1:
+        for href, content, cached in unique_rows():
+            yield cached if cached is not None else remember(href, _parse_unordered(href, content, options))
+        return
+
+    # Keep a bounded window of in-flight documents so memory stays proportional to jobs.
+    pool_context = contextlib.nullcontext(executor) if executor is not None else worker_pool(jobs)
+    with pool_context as pool:
+        pending: Deque[Tuple[str, Future, bool]] = deque()
+
+        def drain_one() -> ChapterRecord:
+            href, future, from_cache = pending.popleft()
+            result = future.result()
+            return result if from_cache else remember(href, result)
+
+        for href, content, cached in unique_rows():
+            if cached is not None:
+                ready: Future = Future()
+                ready.set_result(cached)
+                pending.append((href, ready, True))
+            else:
+                pending.append((href, pool.submit(_parse_unordered, href, content, options), False))
+            if len(pending) >= max(jobs, 1) * 2:
+                yield drain_one()
+        while pending:
+            yield drain_one()
+
+
+EpubInput = Union[Path, BinaryIO]
 
-def load_spine_with_ebooklib(epub_path: Path) -> Iterable[Tuple[int, str, bytes]]:
+
+def load_spine_with_ebooklib(epub_path: EpubInput) -> Iterator[Tuple[int, str, bytes]]:
+    # Import and read eagerly so a missing EbookLib surfaces before iteration starts.
     from ebooklib import ITEM_DOCUMENT  # type: ignore
     from ebooklib import epub  # type: ignore
 
-    book = epub.read_epub(str(epub_path))
-    for order, entry in enumerate(book.spine, start=1):
+    with profile_phase("ebooklib_read"):
+        book = epub.read_epub(str(epub_path) if isinstance(epub_path, Path) else epub_path)
+    return _iter_ebooklib_spine(book, ITEM_DOCUMENT)
+
+
+def _iter_ebooklib_spine(book: object, item_document: int) -> Iterator[Tuple[int, str, bytes]]:
+    for order, entry in enumerate(book.spine, start=1):  # type: ignore[attr-defined]
         item_id = entry[0] if isinstance(entry, (tuple, list)) else entry
-        item = book.get_item_with_id(item_id)
-        if item is None or item.get_type() != ITEM_DOCUMENT:
+        item = book.get_item_with_id(item_id)  # type: ignore[attr-defined]
+        if item is None or item.get_type() != item_document:
             continue
         yield order, item.get_name(), item.get_content()
 
 
-def load_spine_from_zip(epub_path: Path) -> Iterable[Tuple[int, str, bytes]]:
-    with zipfile.ZipFile(epub_path, "r") as archive:
-        container_raw = archive.read("META-INF/container.xml")
-        container_xml = ET.fromstring(container_raw)
-        rootfile = container_xml.find(".//{*}rootfile")
-        if rootfile is None:
-            raise RuntimeError("Unable to locate rootfile in META-INF/container.xml")
-        opf_path = rootfile.attrib.get("full-path")
-        if not opf_path:
-            raise RuntimeError("Missing rootfile full-path attribute")
-
-        opf_raw = archive.read(opf_path)
-        opf_xml = ET.fromstring(opf_raw)
-        opf_dir = posixpath.dirname(opf_path)
-
-        manifest: Dict[str, str] = {}
-        manifest_media: Dict[str, str] = {}
-        for item in opf_xml.findall(".//{*}manifest/{*}item"):
-            item_id = item.attrib.get("id")
-            href = item.attrib.get("href")
-            media_type = item.attrib.get("media-type", "")
-            if item_id and href:
-                manifest[item_id] = href
-                manifest_media[item_id] = media_type
+def _read_opf(archive: zipfile.ZipFile) -> Tuple[str, ET.Element]:
+    """Locate the package document through container.xml and parse it."""
+    container_raw = archive.read("META-INF/container.xml")
+    container_xml = ET.fromstring(container_raw)
+    rootfile = container_xml.find(".//{*}rootfile")
+    if rootfile is None:
+        raise RuntimeError("Unable to locate rootfile in META-INF/container.xml")
+    opf_path = rootfile.attrib.get("full-path")
+    if not opf_path:
+        raise RuntimeError("Missing rootfile full-path attribute")
+    return opf_path, ET.fromstring(archive.read(opf_path))
+
+
+def _spine_paths_from_opf(opf_path: str, opf_xml: ET.Element) -> List[Tuple[str, str]]:
+    opf_dir = posixpath.dirname(opf_path)
+
+    manifest: Dict[str, str] = {}
+    manifest_media: Dict[str, str] = {}
+    for item in opf_xml.findall(".//{*}manifest/{*}item"):
+        item_id = item.attrib.get("id")
+        href = item.attrib.get("href")
+        media_type = item.attrib.get("media-type", "")
+        if item_id and href:
+            manifest[item_id] = href
+            manifest_media[item_id] = media_type
+
+    paths: List[Tuple[str, str]] = []
+    for itemref in opf_xml.findall(".//{*}spine/{*}itemref"):
+        item_id = itemref.attrib.get("idref")
+        if not item_id or item_id not in manifest:
+            continue
+        media_type = manifest_media.get(item_id, "")
+        if "xhtml" not in media_type and "html" not in media_type:
+            continue
+        href = manifest[item_id]
+        paths.append((href, posixpath.normpath(posixpath.join(opf_dir, href))))
+    return paths
+
+
+def _read_spine_paths(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Resolve spine (href, archive path) pairs from container.xml and the OPF."""
+    return _spine_paths_from_opf(*_read_opf(archive))
 
+
+def load_spine_from_zip(epub_path: EpubInput) -> Iterator[Tuple[int, str, bytes]]:
+    """Yield spine documents one at a time, decompressing each member on demand."""
+    with zipfile.ZipFile(epub_path, "r") as archive:
+        with profile_phase("opf"):
+            spine_paths = _read_spine_paths(archive)
         order = 0
-        for itemref in opf_xml.findall(".//{*}spine/{*}itemref"):
-            item_id = itemref.attrib.get("idref")
-            if not item_id or item_id not in manifest:
-                continue
-            media_type = manifest_media.get(item_id, "")
-            if "xhtml" not in media_type and "html" not in media_type:
-                continue
-            href = manifest[item_id]
-            archive_path = posixpath.normpath(posixpath.join(opf_dir, href))
+        for href, archive_path in spine_paths:
             try:
-                content = archive.read(archive_path)
+                info = archive.getinfo(archive_path)
             except KeyError:
                 continue
+            with profile_phase("inflate", nbytes=info.compress_size, document=href):
+                content = archive.read(info)
             order += 1
             yield order, href, content
+            # Drop our reference so only one decompressed member is alive at a time.
+            del content
 
 
-def write_markdown(outline: Dict[str, object], md_path: Path) -> None:
-    chapters: List[Dict[str, object]] = list(outline["chapters"])  # type: ignore[arg-type]
-    section_total = sum(len(chapter["sections"]) for chapter in chapters)
+# (depth, title, archive path with an optional "#fragment") in reading order; depth 1 is top level.
+TocEntry = Tuple[int, str, str]
 
-    lines = [
-        "# EPUB Structure Outline",
-        "",
-        f"- Generated: {outline['generated_at']}",
-        f"- Source: `{outline['source_epub']}`",
-        f"- Source SHA-256: `{outline['source_sha256']}`",
-        f"- Engine: `{outline['engine']}`",
-        f"- Chapters: {len(chapters)}",
-        f"- Sections: {section_total}",
-        "",
-    ]
 
-    for chapter in chapters:
-        lines.extend(
-            [
-                f"## {chapter['order']}. {chapter['title']}",
-                f"- Chapter number: {chapter['chapter_number']}",
-                f"- Href: `{chapter['href']}`",
-                f"- Words: {chapter['word_count']}",
-                f"- Hash: `{chapter['hash']}`",
-            ]
-        )
-        sections = chapter["sections"]
-        if not sections:
-            lines.append("- Sections: _none detected_")
-            lines.append("")
+def _read_toc_entries(archive: zipfile.ZipFile, opf_path: str, opf_xml: ET.Element) -> List[TocEntry]:
+    """Read the EPUB 3 nav document, or the EPUB 2 NCX when there is no usable nav."""
+    opf_dir = posixpath.dirname(opf_path)
+    nav_path = None
+    ncx_path = None
+    for item in opf_xml.findall(".//{*}manifest/{*}item"):
+        href = item.attrib.get("href")
+        if not href:
             continue
-        lines.append("- Sections:")
-        for section in sections:
-            lines.append(
-                f"  - {section['order']}. [{section['level']}] {section['title']} "
-                f"(words: {section['word_count']}, hash: `{section['hash']}`)"
-            )
-        lines.append("")
+        if "nav" in item.attrib.get("properties", "").split():
+            nav_path = posixpath.normpath(posixpath.join(opf_dir, href))
+        elif item.attrib.get("media-type") == "application/x-dtbncx+xml":
+            ncx_path = posixpath.normpath(posixpath.join(opf_dir, href))
 
-    md_path.write_text("\n".join(lines), encoding="utf-8")
+    def resolve(base_path: str, target: str) -> str:
+        path, _, fragment = target.partition("#")
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(base_path), path)) if path else base_path
+        return f"{resolved}#{fragment}" if fragment else resolved
 
+    entries: List[TocEntry] = []
+    if nav_path is not None:
+        try:
+            nav_xml = ET.fromstring(archive.read(nav_path))
+        except (KeyError, ET.ParseError):
+            nav_xml = None
+        if nav_xml is not None:
+            navs = nav_xml.findall(".//{*}nav")
+            toc_navs = [nav for nav in navs if "toc" in nav.attrib.get("{http://www.idpf.org/2007/ops}type", "").split()]
 
-def build_outline(epub_path: Path) -> Dict[str, object]:
-    engine = "ebooklib"
-    try:
-        spine_rows = list(load_spine_with_ebooklib(epub_path))
-    except ModuleNotFoundError:
-        print("EbookLib not installed; using zip parser fallback.", file=sys.stderr)
-        engine = "zip_fallback"
-        spine_rows = list(load_spine_from_zip(epub_path))
+            def walk_nav(ordered_list: ET.Element, depth: int) -> None:
+                for item in ordered_list.findall("{*}li"):
+                    link = item.find("{*}a")
+                    if link is not None and link.attrib.get("href"):
+                        title = normalize_space("".join(link.itertext()))
+                        entries.append((depth, title, resolve(nav_path, link.attrib["href"])))
+                    for child in item.findall("{*}ol"):
+                        walk_nav(child, depth + 1)
 
-    if not spine_rows:
-        raise RuntimeError("No spine XHTML documents found in EPUB.")
+            for nav in (toc_navs or navs)[:1]:
+                for ordered_list in nav.findall("{*}ol"):
+                    walk_nav(ordered_list, 1)
+    if entries or ncx_path is None:
+        return entries
 
-    chapters: List[Dict[str, object]] = []
-    seen_hrefs = set()
-    for order, href, content in spine_rows:
-        if href in seen_hrefs:
-            continue
-        seen_hrefs.add(href)
-        chapter = parse_document(order=len(chapters) + 1, href=href, content_bytes=content)
-        if chapter["word_count"] == 0 and not chapter["sections"]:
-            continue
-        chapters.append(chapter)
+    ncx_xml = ET.fromstring(archive.read(ncx_path))
 
-    if not chapters:
-        raise RuntimeError("Spine parsing finished, but no chapter structure was extracted.")
+    def walk_ncx(parent: ET.Element, depth: int) -> None:
+        for point in parent.findall("{*}navPoint"):
+            label = point.find("{*}navLabel/{*}text")
+            content = point.find("{*}content")
+            if content is not None and content.attrib.get("src"):
+                title = normalize_space("".join(label.itertext())) if label is not None else ""
+                entries.append((depth, title, resolve(ncx_path, content.attrib["src"])))
+            walk_ncx(point, depth + 1)
 
-    return {
-        "generated_at": now_iso(),
-        "source_epub": str(epub_path),
-        "source_sha256": file_sha256(epub_path),
-        "source_size_bytes": epub_path.stat().st_size,
-        "engine": engine,
-        "chapters": chapters,
-    }
+    nav_map = ncx_xml.find(".//{*}navMap")
+    if nav_map is not None:
+        walk_ncx(nav_map, 1)
+    return entries
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Extract a structure-only outline from an EPUB.")
-    parser.add_argument("--input", default="content/source/sybex.epub", help="Input EPUB path")
-    parser.add_argument(
-        "--json-output",
-        default="content/_source_outline/book_outline.json",
-        help="Output JSON path",
-    )
-    parser.add_argument(
-        "--md-output",
-        default="content/_source_outline/book_outline.md",
-        help="Output Markdown path",
-    )
-    args = parser.parse_args()
+class AnchorWordCounter(OutlineParser):
+    """OutlineParser that also splits the word count at the given fragment ids."""
 
-    epub_path = Path(args.input)
-    json_output = Path(args.json_output)
-    md_output = Path(args.md_output)
+    def __init__(self, anchors: Iterable[str], hash_algorithm: str = DEFAULT_HASH_ALGORITHM) -> None:
+        super().__init__(hash_algorithm=hash_algorithm)
+        self._anchors = set(anchors)
+        self._anchor = ""
+        self.anchor_word_counts: Dict[str, int] = {"": 0}
 
-    if not epub_path.exists():
-        print(f"Input EPUB not found: {epub_path}", file=sys.stderr)
-        return 1
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        # Text before this tag still belongs to the previous anchor.
+        self._flush_text()
+        for name, value in attrs:
+            if name == "id" and value in self._anchors:
+                self._anchor = value
+                self.anchor_word_counts.setdefault(value, 0)
+        super().handle_starttag(tag, attrs)
 
-    try:
-        outline = build_outline(epub_path)
-    except Exception as exc:  # pragma: no cover - defensive command-line path
-        print(f"Failed to build outline: {exc}", file=sys.stderr)
-        return 1
+    def _record_word_chunk(self, chunk: str) -> None:
+        before = self.total_word_count
+        super()._record_word_chunk(chunk)
+        # Heading text is left out of section counts, as in body-parsed outlines.
+        if self._heading_level is None:
+            self.anchor_word_counts[self._anchor] += self.total_word_count - before
 
-    json_output.parent.mkdir(parents=True, exist_ok=True)
-    md_output.parent.mkdir(parents=True, exist_ok=True)
 
-    json_output.write_text(json.dumps(outline, indent=2, ensure_ascii=False), encoding="utf-8")
-    write_markdown(outline, md_output)
+def toc_chapter(
+    href: str,
+    entries: List[Tuple[int, str, str]],
+    content_bytes: Optional[bytes],
+    options: Optional[ParseOptions] = None,
+) -> ChapterRecord:
+    """Build a chapter record from the TOC entries (depth, title, fragment) pointing into href.
 
-    chapter_count = len(outline["chapters"])  # type: ignore[index]
-    section_count = sum(len(chapter["sections"]) for chapter in outline["chapters"])  # type: ignore[index]
-    print(
-        f"Outline extracted: {chapter_count} chapters, {section_count} sections "
-        f"-> {json_output} and {md_output}"
-    )
+    The first entry names the chapter and the rest become its sections. Word counts and
+    content hashes need the document body; without content_bytes they are left as None
+    and the hashes cover structure only. The body goes through run_outline_parser, so the
+    per-document guards apply and a cut-off parse is recorded as incomplete.
+    """
+    options = options or ParseOptions()
+    hash_algorithm = options.hash_algorithm
+    chapter_depth, chapter_title, _ = entries[0]
+    chapter_title = chapter_title or slug_to_title(href)
+    counter: Optional[AnchorWordCounter] = None
+    parser_engine: Optional[str] = None
+    incomplete: Optional[Dict[str, object]] = None
+    if content_bytes is not None:
+        anchors = [fragment for _, _, fragment in entries if fragment]
+        with profile_phase("parse", nbytes=len(content_bytes), document=href):
+            parser, parser_engine, incomplete = run_outline_parser(
+                content_bytes, options, functools.partial(AnchorWordCounter, anchors, hash_algorithm)
+            )
+        counter = parser  # type: ignore[assignment]
+
+    sections: List[SectionRecord] = []
+    for section_index, (depth, title, fragment) in enumerate(entries[1:], start=1):
+        level = max(2, depth - chapter_depth + 1)
+        if counter is None:
+            word_count: Optional[int] = None
+            section_hash = stable_hash(href, str(level), title, algorithm=hash_algorithm)
+        else:
+            word_count = counter.anchor_word_counts.get(fragment, 0) if fragment else 0
+            section_hash = stable_hash(href, str(level), title, str(word_count), algorithm=hash_algorithm)
+        sections.append(SectionRecord(section_index, level, title, f"{href}#s{section_index}", word_count, section_hash))
+
+    if counter is None:
+        chapter_hash = stable_hash(href, chapter_title, *(section.hash for section in sections), algorithm=hash_algorithm)
+    else:
+        chapter_hash = stable_hash(
+            href, chapter_title, str(counter.total_word_count), counter.content_hash, algorithm=hash_algorithm
+        )
+    return ChapterRecord(
+        order=0,
+        chapter_number=None,
+        href=href,
+        title=chapter_title,
+        word_count=counter.total_word_count if counter is not None else None,
+        hash=chapter_hash,
+        sections=sections,
+        parser_engine=parser_engine if options.engine != "html" else None,
+        incomplete=incomplete,
+    )
+
+
+def load_outline_from_toc(
+    epub_path: EpubInput, word_counts: bool = False, options: Optional[ParseOptions] = None
+) -> Iterator[ChapterRecord]:
+    """Yield unordered chapter records built from the nav document (or NCX) alone.
+
+    Spine documents are only inflated when word_counts is set; otherwise the whole
+    outline comes from the OPF and the navigation document.
+    """
+    with zipfile.ZipFile(epub_path, "r") as archive:
+        with profile_phase("opf"):
+            opf_path, opf_xml = _read_opf(archive)
+            spine_paths = _spine_paths_from_opf(opf_path, opf_xml)
+        with profile_phase("toc"):
+            toc_entries = _read_toc_entries(archive, opf_path, opf_xml)
+        if not toc_entries:
+            raise RuntimeError("EPUB has no navigation document or NCX entries for --outline-source toc.")
+
+        by_document: Dict[str, List[Tuple[int, str, str]]] = {}
+        for depth, title, target in toc_entries:
+            path, _, fragment = target.partition("#")
+            by_document.setdefault(path, []).append((depth, title, fragment))
+
+        seen_hrefs = set()
+        for href, archive_path in spine_paths:
+            entries = by_document.get(archive_path)
+            if not entries or href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            content = None
+            if word_counts:
+                try:
+                    info = archive.getinfo(archive_path)
+                except KeyError:
+                    continue
+                with profile_phase("inflate", nbytes=info.compress_size, document=href):
+                    content = archive.read(info)
+            yield toc_chapter(href, entries, content, options)
+
+
+def spine_member_keys(epub_path: EpubInput, variant: str = "html") -> Dict[str, str]:
+    """Map spine hrefs to cache keys built from zip central-directory CRC and size."""
+    keys: Dict[str, str] = {}
+    with zipfile.ZipFile(epub_path, "r") as archive:
+        for href, archive_path in _read_spine_paths(archive):
+            try:
+                info = archive.getinfo(archive_path)
+            except KeyError:
+                continue
+            keys[href] = f"v{PARSER_VERSION}:{variant}:{info.CRC:08x}:{info.file_size}"
+    return keys
+
+
+class OutlineCache:
+    """On-disk cache of unordered chapter records keyed by spine member CRC/size."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._previous: Dict[str, Dict[str, object]] = {}
+        self._current: Dict[str, Dict[str, object]] = {}
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(payload, dict) and payload.get("parser_version") == PARSER_VERSION:
+            entries = payload.get("entries")
+            if isinstance(entries, dict):
+                self._previous = entries
+
+    def lookup(self, href: str, key: Optional[str]) -> Optional[ChapterRecord]:
+        entry = self._previous.get(href)
+        if key is None or entry is None or entry.get("key") != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._current[href] = entry
+        # A fresh record each time, so callers may reorder it without touching the cache.
+        return ChapterRecord.from_dict(entry["chapter"])  # type: ignore[arg-type]
+
+    def store(self, href: str, key: Optional[str], chapter: ChapterRecord) -> None:
+        if key is None:
+            return
+        self._current[href] = {"key": key, "chapter": chapter.to_dict()}
+
+    def save(self) -> None:
+        # Only entries seen in this run are kept, so stale hrefs are pruned.
+        payload = {"parser_version": PARSER_VERSION, "entries": self._current}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(self.path, json.dumps(payload, ensure_ascii=False))
+
+    def start_run(self) -> None:
+        """Roll this run's entries over so a long-lived cache can serve the next run."""
+        if self._current:
+            self._previous = self._current
+            self._current = {}
+        self.hits = 0
+        self.misses = 0
+
+
+def _markdown_header_lines(header: Dict[str, object], chapter_count: int, section_count: int) -> List[str]:
+    return [
+        "# EPUB Structure Outline",
+        "",
+        f"- Generated: {header['generated_at']}",
+        f"- Source: `{header['source_epub']}`",
+        f"- Source SHA-256: `{header['source_sha256']}`",
+        *([f"- Engine: `{header['engine']}`"] if "engine" in header else []),
+        *([f"- Hash algorithm: `{header['hash_algorithm']}`"] if "hash_algorithm" in header else []),
+        *([f"- Outline source: `{header['outline_source']}`"] if "outline_source" in header else []),
+        f"- Chapters: {chapter_count}",
+        f"- Sections: {section_count}",
+        "",
+    ]
+
+
+def _markdown_words(word_count: object) -> object:
+    # --outline-source toc leaves word counts as None unless --toc-word-counts is given.
+    return "not counted" if word_count is None else word_count
+
+
+def _markdown_chapter_lines(chapter: Dict[str, object]) -> List[str]:
+    lines = [
+        f"## {chapter['order']}. {chapter['title']}",
+        f"- Chapter number: {chapter['chapter_number']}",
+        f"- Href: `{chapter['href']}`",
+        f"- Words: {_markdown_words(chapter['word_count'])}",
+        f"- Hash: `{chapter['hash']}`",
+    ]
+    if "parser_engine" in chapter:
+        lines.append(f"- Parser: `{chapter['parser_engine']}`")
+    if "incomplete" in chapter:
+        incomplete: Dict[str, object] = chapter["incomplete"]  # type: ignore[assignment]
+        lines.append(
+            f"- Incomplete: {incomplete['reason']} after {incomplete['parsed_bytes']} "
+            f"of {incomplete['total_bytes']} bytes"
+        )
+    sections: List[Dict[str, object]] = chapter["sections"]  # type: ignore[assignment]
+    if not sections:
+        lines.append("- Sections: _none detected_")
+        lines.append("")
+        return lines
+    lines.append("- Sections:")
+    for section in sections:
+        lines.append(
+            f"  - {section['order']}. [{section['level']}] {section['title']} "
+            f"(words: {_markdown_words(section['word_count'])}, hash: `{section['hash']}`)"
+        )
+    lines.append("")
+    return lines
+
+
+def write_markdown(outline: Dict[str, object], md_path: Path) -> None:
+    chapters: List[Dict[str, object]] = list(outline["chapters"])  # type: ignore[arg-type]
+    section_total = sum(len(chapter["sections"]) for chapter in chapters)  # type: ignore[arg-type]
+
+    lines = _markdown_header_lines(outline, len(chapters), section_total)
+    for chapter in chapters:
+        lines.extend(_markdown_chapter_lines(chapter))
+
+    write_text_atomic(md_path, "\n".join(lines))
+
+
+class StreamingOutlineWriter:
+    """Writes NDJSON and Markdown outlines one chapter at a time.
+
+    The NDJSON file holds a header record, one record per chapter and a closing summary.
+    Markdown needs chapter and section totals up front, so chapter blocks are spooled to
+    a temporary file and copied behind the header once the totals are known. Both files
+    are written under temporary names and only replace the outputs on finish().
+    """
+
+    def __init__(self, json_path: Path, md_path: Path) -> None:
+        self.json_path = json_path
+        self.md_path = md_path
+        self.chapter_count = 0
+        self.section_count = 0
+        self._json_tmp = json_path.with_name(f".{json_path.name}.tmp")
+        self._md_tmp = md_path.with_name(f".{md_path.name}.tmp")
+        self._json_handle = self._json_tmp.open("w", encoding="utf-8")
+        self._md_body = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._header: Optional[Dict[str, object]] = None
+
+    def _write_record(self, record: Dict[str, object]) -> None:
+        self._json_handle.write(json.dumps(record, ensure_ascii=False))
+        self._json_handle.write("\n")
+
+    def write_chapter(self, header: Dict[str, object], chapter: Dict[str, object]) -> None:
+        if self._header is None:
+            self._header = dict(header)
+            self._write_record({"record": "header", **header})
+        self._write_record({"record": "chapter", **chapter})
+        self._md_body.write("\n")
+        self._md_body.write("\n".join(_markdown_chapter_lines(chapter)))
+        self.chapter_count += 1
+        self.section_count += len(chapter["sections"])  # type: ignore[arg-type]
+
+    def finish(self, timings: Optional[Dict[str, object]] = None) -> None:
+        if self._header is None:
+            raise RuntimeError("No chapters were written to the streaming outline.")
+        summary: Dict[str, object] = {
+            "record": "summary",
+            "chapters": self.chapter_count,
+            "sections": self.section_count,
+        }
+        if timings is not None:
+            summary["timings"] = timings
+        self._write_record(summary)
+        self._json_handle.close()
+
+        with self._md_tmp.open("w", encoding="utf-8") as md_handle:
+            md_handle.write("\n".join(_markdown_header_lines(self._header, self.chapter_count, self.section_count)))
+            self._md_body.seek(0)
+            shutil.copyfileobj(self._md_body, md_handle)
+        self._md_body.close()
+
+        os.replace(self._json_tmp, self.json_path)
+        os.replace(self._md_tmp, self.md_path)
+
+    def abort(self) -> None:
+        self._json_handle.close()
+        self._md_body.close()
+        for tmp_path in (self._json_tmp, self._md_tmp):
+            tmp_path.unlink(missing_ok=True)
+
+
+def _binary_word_count(word_count: object) -> int:
+    return BINARY_NO_WORD_COUNT if word_count is None else int(word_count)  # type: ignore[call-overload]
+
+
+class BinaryOutlineWriter:
+    """Accumulates chapters into the compact binary outline format (--binary-output).
+
+    Layout, all integers little-endian:
+    - header (BINARY_HEADER): magic, format version, hash width in bytes, chapter and
+      section counts, record widths, and the offsets of the chapter table, the section
+      table and the string table; the outline header fields are a JSON string in the table
+    - chapter table: one BINARY_CHAPTER record plus the raw hash per chapter
+    - section table: one BINARY_SECTION record plus the raw hash per section, numbered
+      across the whole book, each pointing back at its chapter
+    - string table: UTF-8 titles and hrefs, referenced by (offset, length) and deduplicated
+
+    Every record has a fixed width, so a reader can seek straight to chapter or section i.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._hash_size: Optional[int] = None
+        self._chapters = bytearray()
+        self._sections = bytearray()
+        self._strings = bytearray()
+        self._string_refs: Dict[str, Tuple[int, int]] = {}
+        self.chapter_count = 0
+        self.section_count = 0
+
+    def _string(self, value: str) -> Tuple[int, int]:
+        ref = self._string_refs.get(value)
+        if ref is None:
+            encoded = value.encode("utf-8")
+            ref = (len(self._strings), len(encoded))
+            self._strings.extend(encoded)
+            self._string_refs[value] = ref
+        return ref
+
+    def _hash(self, hex_digest: object) -> bytes:
+        raw = bytes.fromhex(str(hex_digest))
+        if self._hash_size is None:
+            self._hash_size = len(raw)
+        elif len(raw) != self._hash_size:
+            raise ValueError(f"Mixed hash widths in one outline: {len(raw)} and {self._hash_size} bytes")
+        return raw
+
+    def add_chapter(self, chapter: Dict[str, object]) -> None:
+        sections: List[Dict[str, object]] = chapter["sections"]  # type: ignore[assignment]
+        chapter_number = chapter.get("chapter_number")
+        self._chapters.extend(
+            BINARY_CHAPTER.pack(
+                int(chapter["order"]),  # type: ignore[call-overload]
+                -1 if chapter_number is None else int(chapter_number),  # type: ignore[call-overload]
+                _binary_word_count(chapter["word_count"]),
+                *self._string(str(chapter["title"])),
+                *self._string(str(chapter["href"])),
+                self.section_count,
+                len(sections),
+            )
+        )
+        self._chapters.extend(self._hash(chapter["hash"]))
+        for section in sections:
+            self._sections.extend(
+                BINARY_SECTION.pack(
+                    int(section["order"]),  # type: ignore[call-overload]
+                    self.chapter_count,
+                    int(section["level"]),  # type: ignore[call-overload]
+                    _binary_word_count(section["word_count"]),
+                    *self._string(str(section["title"])),
+                    *self._string(str(section["href"])),
+                )
+            )
+            self._sections.extend(self._hash(section["hash"]))
+        self.chapter_count += 1
+        self.section_count += len(sections)
+
+    def finish(self, header: Dict[str, object]) -> None:
+        path = self.path
+        meta_offset, meta_length = self._string(json.dumps(header, ensure_ascii=False, sort_keys=True))
+        hash_size = self._hash_size or 0
+        chapters_offset = BINARY_HEADER.size
+        sections_offset = chapters_offset + len(self._chapters)
+        strings_offset = sections_offset + len(self._sections)
+        head = BINARY_HEADER.pack(
+            BINARY_MAGIC,
+            BINARY_VERSION,
+            hash_size,
+            self.chapter_count,
+            self.section_count,
+            BINARY_CHAPTER.size + hash_size,
+            BINARY_SECTION.size + hash_size,
+            chapters_offset,
+            sections_offset,
+            strings_offset,
+            len(self._strings),
+            meta_offset,
+            meta_length,
+        )
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(head)
+            handle.write(self._chapters)
+            handle.write(self._sections)
+            handle.write(self._strings)
+        os.replace(tmp_path, path)
+
+    def abort(self) -> None:
+        self._chapters.clear()
+        self._sections.clear()
+        self._strings.clear()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE chapters (
+    id INTEGER PRIMARY KEY,
+    chapter_number INTEGER,
+    href TEXT NOT NULL,
+    title TEXT NOT NULL,
+    word_count INTEGER,
+    hash TEXT NOT NULL,
+    parser_engine TEXT
+);
+CREATE TABLE sections (
+    id INTEGER PRIMARY KEY,
+    chapter_id INTEGER NOT NULL REFERENCES chapters(id),
+    section_order INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    href TEXT NOT NULL,
+    word_count INTEGER,
+    hash TEXT NOT NULL
+);
+"""
+
+# Built after the rows are in, which is cheaper than maintaining them per insert.
+SQLITE_INDEXES = """
+CREATE INDEX chapters_href ON chapters(href);
+CREATE INDEX chapters_hash ON chapters(hash);
+CREATE INDEX chapters_chapter_number ON chapters(chapter_number);
+CREATE INDEX sections_chapter_id ON sections(chapter_id, section_order);
+CREATE INDEX sections_href ON sections(href);
+CREATE INDEX sections_hash ON sections(hash);
+"""
+
+
+class SqliteOutlineWriter:
+    """Writes the outline into a SQLite database (--sqlite) one chapter at a time.
+
+    chapters.id is the outline order and sections.id numbers sections across the book.
+    section_titles is an external-content FTS5 index over sections.title; it is skipped
+    with a warning when the local SQLite build lacks FTS5. The database is built under a
+    temporary name and only replaces the output on finish().
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.fts5 = False
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._tmp_path.unlink(missing_ok=True)
+        self._connection = sqlite3.connect(self._tmp_path)
+        self._connection.executescript(SQLITE_SCHEMA)
+        self._section_id = 0
+
+    def add_chapter(self, chapter: Dict[str, object]) -> None:
+        self._connection.execute(
+            "INSERT INTO chapters VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                chapter["order"],
+                chapter.get("chapter_number"),
+                chapter["href"],
+                chapter["title"],
+                chapter["word_count"],
+                chapter["hash"],
+                chapter.get("parser_engine"),
+            ),
+        )
+        sections: List[Dict[str, object]] = chapter["sections"]  # type: ignore[assignment]
+        rows = []
+        for section in sections:
+            self._section_id += 1
+            rows.append(
+                (
+                    self._section_id,
+                    chapter["order"],
+                    section["order"],
+                    section["level"],
+                    section["title"],
+                    section["href"],
+                    section["word_count"],
+                    section["hash"],
+                )
+            )
+        self._connection.executemany("INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def finish(self, header: Dict[str, object]) -> None:
+        connection = self._connection
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False)) for key, value in header.items()],
+        )
+        connection.executescript(SQLITE_INDEXES)
+        try:
+            connection.execute(
+                "CREATE VIRTUAL TABLE section_titles USING fts5(title, content='sections', content_rowid='id')"
+            )
+        except sqlite3.OperationalError as exc:
+            print(f"SQLite FTS5 unavailable ({exc}); --sqlite output has no section_titles index.", file=sys.stderr)
+        else:
+            connection.execute("INSERT INTO section_titles(section_titles) VALUES ('rebuild')")
+            self.fts5 = True
+        connection.commit()
+        connection.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._connection.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+# Secondary outputs fed chapter by chapter next to the JSON/NDJSON and Markdown outlines.
+OutlineWriter = Union[BinaryOutlineWriter, SqliteOutlineWriter]
+
+
+def write_outline_outputs(outline: Dict[str, object], writers: List[OutlineWriter]) -> None:
+    """Feed a built outline through secondary writers such as --binary-output and --sqlite."""
+    header = {key: value for key, value in outline.items() if key != "chapters"}
+    for writer in writers:
+        try:
+            for chapter in outline["chapters"]:  # type: ignore[attr-defined]
+                writer.add_chapter(chapter)
+            writer.finish(header)
+        except BaseException:
+            writer.abort()
+            raise
+
+
+class BinaryOutline:
+    """Memory-mapped reader for --binary-output files.
+
+    chapter(i) and section(i) decode a single fixed-width record and the strings it
+    references; nothing else in the file is touched. Use as a context manager, or call
+    close() when done.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map.size() < BINARY_HEADER.size or self._map[:4] != BINARY_MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a binary outline: {path}")
+        (
+            _magic,
+            version,
+            self.hash_size,
+            self.chapter_count,
+            self.section_count,
+            self._chapter_width,
+            self._section_width,
+            self._chapters_offset,
+            self._sections_offset,
+            self._strings_offset,
+            _strings_size,
+            meta_offset,
+            meta_length,
+        ) = BINARY_HEADER.unpack_from(self._map, 0)
+        if version != BINARY_VERSION:
+            self._map.close()
+            raise ValueError(f"Unsupported binary outline version {version} in {path}")
+        self.header: Dict[str, object] = json.loads(self._string(meta_offset, meta_length))
+
+    def __enter__(self) -> "BinaryOutline":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._map[start : start + length].decode("utf-8")
+
+    def _hash(self, record_offset: int, fixed_size: int) -> str:
+        start = record_offset + fixed_size
+        return self._map[start : start + self.hash_size].hex()
+
+    def chapter(self, index: int, with_sections: bool = False) -> Dict[str, object]:
+        if not 0 <= index < self.chapter_count:
+            raise IndexError(f"chapter index {index} out of range")
+        offset = self._chapters_offset + index * self._chapter_width
+        (
+            order,
+            chapter_number,
+            word_count,
+            title_offset,
+            title_length,
+            href_offset,
+            href_length,
+            first_section,
+            section_count,
+        ) = BINARY_CHAPTER.unpack_from(self._map, offset)
+        chapter: Dict[str, object] = {
+            "order": order,
+            "chapter_number": None if chapter_number < 0 else chapter_number,
+            "href": self._string(href_offset, href_length),
+            "title": self._string(title_offset, title_length),
+            "word_count": None if word_count == BINARY_NO_WORD_COUNT else word_count,
+            "hash": self._hash(offset, BINARY_CHAPTER.size),
+        }
+        if with_sections:
+            chapter["sections"] = [self.section(first_section + step) for step in range(section_count)]
+        return chapter
+
+    def section(self, index: int) -> Dict[str, object]:
+        """Section by position across the whole book; "chapter_index" names its chapter."""
+        if not 0 <= index < self.section_count:
+            raise IndexError(f"section index {index} out of range")
+        offset = self._sections_offset + index * self._section_width
+        order, chapter_index, level, word_count, title_offset, title_length, href_offset, href_length = (
+            BINARY_SECTION.unpack_from(self._map, offset)
+        )
+        return {
+            "order": order,
+            "level": level,
+            "title": self._string(title_offset, title_length),
+            "href": self._string(href_offset, href_length),
+            "word_count": None if word_count == BINARY_NO_WORD_COUNT else word_count,
+            "hash": self._hash(offset, BINARY_SECTION.size),
+            "chapter_index": chapter_index,
+        }
+
+    def to_outline(self) -> Dict[str, object]:
+        chapters = []
+        for index in range(self.chapter_count):
+            chapter = self.chapter(index, with_sections=True)
+            for section in chapter["sections"]:  # type: ignore[attr-defined]
+                del section["chapter_index"]
+            chapters.append(chapter)
+        return {**self.header, "chapters": chapters}
+
+
+def iter_outline(
+    epub: EpubSourceInput,
+    jobs: int = 1,
+    cache: Optional[OutlineCache] = None,
+    io_stats: Optional[Dict[str, int]] = None,
+    options: Optional[ParseOptions] = None,
+    loader: str = "auto",
+    profiler: Optional[PhaseProfiler] = None,
+    header: Optional[Dict[str, object]] = None,
+    executor: Optional[Executor] = None,
+    outline_source: str = "body",
+    toc_word_counts: bool = False,
+    engine: Optional[str] = None,
+) -> Iterator[ChapterRecord]:
+    """Yield ordered chapter records as soon as each spine document is parsed.
+
+    ``epub`` is a path, an open binary file, the EPUB bytes or an open EpubSource. Records are ChapterRecord
+    instances; call ``to_dict()`` for the JSON shape. ``engine`` ("html" or "expat")
+    overrides ``options.engine``. When ``header`` is given it is filled with the outline
+    metadata (everything except ``chapters``) before the first chapter is yielded. ``outline_source="toc"`` reads
+    the structure from the navigation document instead of parsing chapter bodies; pass
+    ``toc_word_counts`` to inflate the documents anyway for word counts and content hashes.
+    """
+    options = options or ParseOptions()
+    if engine is not None:
+        if engine not in PARSER_ENGINES:
+            raise ValueError(f"Unknown parser engine {engine!r}; expected one of {', '.join(PARSER_ENGINES)}")
+        options = replace(options, engine=engine)
+    if profiler is not None:
+        options = replace(options, profile=True)
+    header = header if header is not None else {}
+    source_context: contextlib.AbstractContextManager = (
+        contextlib.nullcontext(epub) if isinstance(epub, EpubSource) else EpubSource(epub)
+    )
+    with activate_profiler(profiler), source_context as source:
+        yield from _iter_outline_from_source(
+            source,
+            jobs=jobs,
+            cache=cache,
+            options=options,
+            loader=loader,
+            profiler=profiler,
+            header=header,
+            executor=executor,
+            outline_source=outline_source,
+            toc_word_counts=toc_word_counts,
+        )
+        if io_stats is not None:
+            io_stats.update(source.bytes_read)
+            io_stats["source_size"] = source.size
+
+
+def build_outline(
+    epub: EpubSourceInput,
+    jobs: int = 1,
+    cache: Optional[OutlineCache] = None,
+    io_stats: Optional[Dict[str, int]] = None,
+    options: Optional[ParseOptions] = None,
+    loader: str = "auto",
+    profiler: Optional[PhaseProfiler] = None,
+    executor: Optional[Executor] = None,
+    outline_source: str = "body",
+    toc_word_counts: bool = False,
+    engine: Optional[str] = None,
+) -> Dict[str, object]:
+    """Return the outline document the CLI writes as JSON; arguments as for iter_outline."""
+    header: Dict[str, object] = {}
+    chapters = [
+        chapter.to_dict()
+        for chapter in iter_outline(
+            epub,
+            jobs=jobs,
+            cache=cache,
+            io_stats=io_stats,
+            options=options,
+            loader=loader,
+            profiler=profiler,
+            header=header,
+            executor=executor,
+            outline_source=outline_source,
+            toc_word_counts=toc_word_counts,
+            engine=engine,
+        )
+    ]
+    return {**header, "chapters": chapters}
+
+
+def _iter_outline_from_source(
+    source: EpubSource,
+    jobs: int,
+    cache: Optional[OutlineCache],
+    options: ParseOptions,
+    loader: str,
+    profiler: Optional[PhaseProfiler],
+    header: Dict[str, object],
+    executor: Optional[Executor],
+    outline_source: str = "body",
+    toc_word_counts: bool = False,
+) -> Iterator[ChapterRecord]:
+    if outline_source == "toc":
+        yield from _iter_toc_outline_from_source(source, header, toc_word_counts, options)
+        return
+
+    engine = "ebooklib"
+    spine_rows: Iterable[Tuple[int, str, bytes]]
+    try:
+        if loader == "zip_fallback":
+            raise ModuleNotFoundError("zip loader requested")
+        spine_rows = load_spine_with_ebooklib(source.reader("ebooklib"))
+    except ModuleNotFoundError:
+        if loader == "ebooklib":
+            raise
+        if loader == "auto":
+            print("EbookLib not installed; using zip parser fallback.", file=sys.stderr)
+        engine = "zip_fallback"
+        spine_rows = load_spine_from_zip(source.reader("zip"))
+
+    header.update(
+        {
+            "generated_at": now_iso(),
+            "source_epub": source.name,
+            "source_sha256": source.sha256(),
+            "source_size_bytes": source.size,
+            "engine": engine,
+            "hash_algorithm": options.hash_algorithm,
+        }
+    )
+
+    spine_count = 0
+
+    def counted(rows: Iterable[Tuple[int, str, bytes]]) -> Iterator[Tuple[int, str, bytes]]:
+        nonlocal spine_count
+        for row in rows:
+            spine_count += 1
+            yield row
+
+    # Stream the spine: each document is decompressed, reduced to its chapter
+    # record and released before the next one is read.
+    chapter_count = 0
+    member_keys = None
+    if cache is not None:
+        with profile_phase("cache_keys"):
+            member_keys = spine_member_keys(source.reader("cache_keys"), variant=options.cache_variant)
+    parsed = iter_parsed_documents(
+        counted(spine_rows),
+        jobs=jobs,
+        cache=cache,
+        member_keys=member_keys,
+        options=options,
+        profiler=profiler,
+        executor=executor,
+    )
+    for chapter in parsed:
+        if chapter.word_count == 0 and not chapter.sections and chapter.incomplete is None:
+            continue
+        warn_incomplete(chapter)
+        chapter_count += 1
+        yield assign_chapter_order(chapter, chapter_count)
+
+    if spine_count == 0:
+        raise RuntimeError("No spine XHTML documents found in EPUB.")
+    if chapter_count == 0:
+        raise RuntimeError("Spine parsing finished, but no chapter structure was extracted.")
+
+
+def _iter_toc_outline_from_source(
+    source: EpubSource, header: Dict[str, object], word_counts: bool, options: ParseOptions
+) -> Iterator[ChapterRecord]:
+    chapters = load_outline_from_toc(source.reader("toc"), word_counts=word_counts, options=options)
+    header.update(
+        {
+            "generated_at": now_iso(),
+            "source_epub": source.name,
+            "source_sha256": source.sha256(),
+            "source_size_bytes": source.size,
+            # No "engine": the nav document and OPF are read straight from the archive whatever
+            # --loader says, so there is no spine loader to report.
+            "hash_algorithm": options.hash_algorithm,
+            "outline_source": "toc",
+        }
+    )
+    chapter_count = 0
+    for chapter in chapters:
+        warn_incomplete(chapter)
+        chapter_count += 1
+        yield assign_chapter_order(chapter, chapter_count)
+    if chapter_count == 0:
+        raise RuntimeError("Navigation entries do not point at any spine document.")
+
+
+def dump_outline_json(outline: Dict[str, object], profiler: Optional[PhaseProfiler] = None) -> str:
+    if profiler is not None:
+        # Timings are snapshotted before serializing, so they cover every phase except json_dumps;
+        # run_single reports that one with the rest on stderr.
+        outline = {**outline, "timings": profiler.as_dict()}
+    with profile_phase("json_dumps"):
+        return json.dumps(outline, indent=2, ensure_ascii=False)
+
+
+def write_streaming_outline(
+    epub_path: Path,
+    json_path: Path,
+    md_path: Path,
+    profiler: Optional[PhaseProfiler] = None,
+    extra_writers: Optional[List[OutlineWriter]] = None,
+    **run_options: object,
+) -> Tuple[int, int]:
+    """Stream chapters into NDJSON and Markdown as they are parsed; returns chapter/section totals."""
+    writer = StreamingOutlineWriter(json_path, md_path)
+    extra_writers = extra_writers or []
+    header: Dict[str, object] = {}
+    try:
+        for record in iter_outline(epub_path, profiler=profiler, header=header, **run_options):  # type: ignore[arg-type]
+            with profile_phase("write_chapter", document=record.href):
+                chapter = record.to_dict()
+                writer.write_chapter(header, chapter)
+                for extra in extra_writers:
+                    extra.add_chapter(chapter)
+        writer.finish(profiler.as_dict() if profiler is not None else None)
+        for extra in extra_writers:
+            extra.finish(header)
+    except BaseException:
+        writer.abort()
+        for extra in extra_writers:
+            extra.abort()
+        raise
+    return writer.chapter_count, writer.section_count
+
+
+def _is_ndjson_header(line: bytes) -> bool:
+    # NDJSON outlines open with {"record": "header", ...}; an indented JSON outline's first line is just "{".
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(record, dict) and record.get("record") == "header"
+
+
+def load_outline(outline_path: Path) -> Dict[str, object]:
+    """Read a JSON outline, or reassemble one from --format ndjson records or --binary-output."""
+    with outline_path.open("rb") as handle:
+        lead = handle.read(len(BINARY_MAGIC))
+        first_line = lead + handle.readline()
+    if lead == BINARY_MAGIC:
+        with BinaryOutline(outline_path) as binary:
+            return binary.to_outline()
+    # The format is told from the content, not the file name: --format ndjson may write to any path.
+    if not _is_ndjson_header(first_line):
+        return json.loads(outline_path.read_text(encoding="utf-8"))
+    outline: Dict[str, object] = {}
+    chapters: List[Dict[str, object]] = []
+    with outline_path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop("record", None)
+            if kind == "header":
+                outline.update(record)
+            elif kind == "chapter":
+                chapters.append(record)
+    outline["chapters"] = chapters
+    return outline
+
+
+def section_fingerprint(section: Dict[str, object]) -> str:
+    """Position-independent section hash; stable_hash in the outline includes the href."""
+    return stable_hash(str(section["level"]), str(section["title"]), str(section["word_count"]))
+
+
+def diff_outlines(previous: Dict[str, object], current: Dict[str, object]) -> Dict[str, object]:
+    """Compare two outlines in linear time using hash indexes.
+
+    Chapters are matched by href, so a chapter whose hash is unchanged is skipped outright.
+    For the rest, sections are matched in three passes, each a dict lookup per section:
+    identical (level, title, word_count) fingerprints are unchanged or moved, the same
+    title in the same chapter with a new word count is reworded, and a new title in the
+    same slot is reworded too. Whatever is left over was added or removed. Outlines
+    hashed with different algorithms, or read from different outline sources, cannot be
+    compared and raise ValueError.
+    """
+    previous_algorithm, current_algorithm = outline_hash_algorithm(previous), outline_hash_algorithm(current)
+    if previous_algorithm != current_algorithm:
+        raise ValueError(
+            f"Cannot compare outline hashes across algorithms ({previous_algorithm} vs {current_algorithm}); "
+            "re-extract both outlines with the same --hash"
+        )
+    previous_source, current_source = outline_source_of(previous), outline_source_of(current)
+    if previous_source != current_source:
+        raise ValueError(
+            f"Cannot compare outlines across outline sources ({previous_source} vs {current_source}); "
+            "re-extract both outlines with the same --outline-source"
+        )
+    previous_chapters: List[Dict[str, object]] = list(previous.get("chapters", []))  # type: ignore[call-overload]
+    current_chapters: List[Dict[str, object]] = list(current.get("chapters", []))  # type: ignore[call-overload]
+    previous_by_href = {str(chapter["href"]): chapter for chapter in previous_chapters}
+    current_by_href = {str(chapter["href"]): chapter for chapter in current_chapters}
+
+    chapters_added = [href for href in current_by_href if href not in previous_by_href]
+    chapters_removed = [href for href in previous_by_href if href not in current_by_href]
+    chapters_changed = [
+        href
+        for href, chapter in current_by_href.items()
+        if href in previous_by_href and previous_by_href[href]["hash"] != chapter["hash"]
+    ]
+    changed_hrefs = set(chapters_changed)
+    unchanged_hrefs = {href for href in current_by_href if href in previous_by_href and href not in changed_hrefs}
+
+    def section_rows(chapters: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        rows = []
+        for chapter in chapters:
+            chapter_href = str(chapter["href"])
+            if chapter_href in unchanged_hrefs:
+                continue
+            for section in chapter["sections"]:  # type: ignore[attr-defined]
+                rows.append({"chapter_href": chapter_href, **section})
+        return rows
+
+    old_rows = section_rows(previous_chapters)
+    new_rows = section_rows(current_chapters)
+
+    def locate(row: Dict[str, object]) -> Dict[str, object]:
+        return {key: row[key] for key in ("chapter_href", "order", "level", "title", "href", "word_count", "hash")}
+
+    def match(
+        key_of: Callable[[Dict[str, object]], Tuple[object, ...]],
+        olds: List[Dict[str, object]],
+        news: List[Dict[str, object]],
+    ) -> Tuple[List[Tuple[Dict[str, object], Dict[str, object]]], List[Dict[str, object]], List[Dict[str, object]]]:
+        index: Dict[Tuple[object, ...], Deque[Dict[str, object]]] = {}
+        for row in olds:
+            index.setdefault(key_of(row), deque()).append(row)
+        pairs = []
+        unmatched_new = []
+        for row in news:
+            candidates = index.get(key_of(row))
+            if candidates:
+                pairs.append((candidates.popleft(), row))
+            else:
+                unmatched_new.append(row)
+        matched_old = {id(old) for old, _new in pairs}
+        return pairs, [row for row in olds if id(row) not in matched_old], unmatched_new
+
+    same_pairs, old_rows, new_rows = match(lambda row: (section_fingerprint(row),), old_rows, new_rows)
+    body_pairs, old_rows, new_rows = match(lambda row: (row["chapter_href"], row["level"], row["title"]), old_rows, new_rows)
+    slot_pairs, old_rows, new_rows = match(lambda row: (row["chapter_href"], row["order"], row["level"]), old_rows, new_rows)
+
+    moved = [
+        {"from": locate(old), "to": locate(new)}
+        for old, new in same_pairs
+        if (old["chapter_href"], old["order"]) != (new["chapter_href"], new["order"])
+    ]
+    reworded = [{"from": locate(old), "to": locate(new)} for old, new in body_pairs + slot_pairs]
+    added = [locate(row) for row in new_rows]
+    removed = [locate(row) for row in old_rows]
+
+    touched = set(chapters_added) | set(chapters_changed)
+    for row in added:
+        touched.add(str(row["chapter_href"]))
+    for pair in moved + reworded:
+        touched.add(str(pair["to"]["chapter_href"]))  # type: ignore[index]
+        touched.add(str(pair["from"]["chapter_href"]))  # type: ignore[index]
+    for row in removed:
+        touched.add(str(row["chapter_href"]))
+    affected = [
+        {
+            "href": href,
+            "chapter_number": current_by_href[href]["chapter_number"] if href in current_by_href else None,
+            "status": "added" if href in chapters_added else "removed" if href in chapters_removed else "changed",
+        }
+        for href in list(current_by_href) + chapters_removed
+        if href in touched or href in chapters_removed
+    ]
+
+    return {
+        "generated_at": now_iso(),
+        "previous": {key: previous.get(key) for key in ("generated_at", "source_sha256")},
+        "current": {key: current.get(key) for key in ("generated_at", "source_sha256")},
+        "summary": {
+            "chapters_added": len(chapters_added),
+            "chapters_removed": len(chapters_removed),
+            "chapters_changed": len(chapters_changed),
+            "sections_added": len(added),
+            "sections_removed": len(removed),
+            "sections_moved": len(moved),
+            "sections_reworded": len(reworded),
+            "sections_unchanged": len(same_pairs) - len(moved) + sum(
+                len(current_by_href[href]["sections"]) for href in unchanged_hrefs  # type: ignore[arg-type]
+            ),
+        },
+        "affected_chapters": affected,
+        "sections": {"added": added, "removed": removed, "moved": moved, "reworded": reworded},
+    }
+
+
+class SimHashIndex:
+    """Banded LSH over 64-bit section sketches.
+
+    Each sketch is filed under SIMHASH_BANDS (band, value) buckets, and a query only
+    compares against sketches sharing a bucket, so matching a new edition costs roughly
+    one bucket scan per section instead of a scan of every old section.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._sketches: List[int] = []
+
+    @staticmethod
+    def _bands(sketch: int) -> Iterator[Tuple[int, int]]:
+        width = SIMHASH_BITS // SIMHASH_BANDS
+        mask = (1 << width) - 1
+        for band in range(SIMHASH_BANDS):
+            yield band, (sketch >> (band * width)) & mask
+
+    def add(self, sketch: int) -> int:
+        item = len(self._sketches)
+        self._sketches.append(sketch)
+        for bucket in self._bands(sketch):
+            self._buckets.setdefault(bucket, []).append(item)
+        return item
+
+    def query(self, sketch: int, max_distance: int = SIMHASH_MAX_DISTANCE) -> List[Tuple[int, int]]:
+        """Return (distance, item) pairs within max_distance bits, nearest first."""
+        candidates = set()
+        for bucket in self._bands(sketch):
+            candidates.update(self._buckets.get(bucket, ()))
+        found = []
+        for item in candidates:
+            distance = (self._sketches[item] ^ sketch).bit_count()
+            if distance <= max_distance:
+                found.append((distance, item))
+        found.sort()
+        return found
+
+
+def outline_map_id(chapter: Dict[str, object], section: Optional[Dict[str, object]] = None) -> str:
+    """Mirror buildOutlineId in lib/coverage.ts, including its 32-bit FNV-style string hash."""
+    source = section if section is not None else chapter
+    hash_input = f"{chapter['order']}|{source['href']}|{source['title']}"
+    value = 0x811C9DC5
+    # JavaScript hashes UTF-16 code units, so astral characters count as surrogate pairs.
+    encoded = hash_input.encode("utf-16-le")
+    for index in range(0, len(encoded), 2):
+        value ^= encoded[index] | (encoded[index + 1] << 8)
+        value = (value + (value << 1) + (value << 4) + (value << 7) + (value << 8) + (value << 24)) & 0xFFFFFFFF
+    section_order = section["order"] if section is not None else 0
+    return f"ol-{chapter['order']}-{section_order}-{value:08x}"
+
+
+def outline_map_rows(outline: Dict[str, object]) -> List[Dict[str, object]]:
+    """Flatten an outline the way flattenOutline in lib/coverage.ts does, with map ids."""
+    rows = []
+    for chapter in outline.get("chapters", []):  # type: ignore[attr-defined]
+        sections: List[Dict[str, object]] = chapter.get("sections") or []
+        for section in sections or [None]:
+            source = section if section is not None else chapter
+            rows.append(
+                {
+                    "outlineId": outline_map_id(chapter, section),
+                    "title": source["title"],
+                    "href": source["href"],
+                    "simhash": source.get("simhash"),
+                }
+            )
+    return rows
+
+
+def carry_outline_map(
+    map_doc: Dict[str, object], previous: Dict[str, object], current: Dict[str, object]
+) -> Tuple[Dict[str, object], Dict[str, int]]:
+    """Point outline-map entries made against previous at the matching rows of current.
+
+    Entries whose outlineId still exists are kept. The rest are matched in two passes:
+    a previous row with the same title and href is taken as is, then the nearest
+    SimHash sketch (via SimHashIndex) among the current rows nobody has claimed yet. An
+    entry matched only by sketch is demoted from "done" to "draft" for review. Entries
+    without a match are left untouched.
+    """
+    previous_rows = {str(row["outlineId"]): row for row in outline_map_rows(previous)}
+    current_rows = outline_map_rows(current)
+    current_ids = {str(row["outlineId"]) for row in current_rows}
+    entries: List[Dict[str, object]] = [dict(entry) for entry in map_doc.get("entries", [])]  # type: ignore[attr-defined]
+    claimed = {str(entry["outlineId"]) for entry in entries if entry["outlineId"] in current_ids}
+    stats = {"kept": len(claimed), "exact": 0, "sketch": 0, "unmatched": 0}
+
+    by_title_href: Dict[Tuple[object, object], Deque[Dict[str, object]]] = {}
+    index = SimHashIndex()
+    indexed_rows: List[Dict[str, object]] = []
+    for row in current_rows:
+        if row["outlineId"] in claimed:
+            continue
+        by_title_href.setdefault((row["title"], row["href"]), deque()).append(row)
+        if row["simhash"]:
+            index.add(int(str(row["simhash"]), 16))
+            indexed_rows.append(row)
+
+    def take(entry: Dict[str, object], row: Dict[str, object]) -> None:
+        claimed.add(str(row["outlineId"]))
+        entry.update({"outlineId": row["outlineId"], "title": row["title"], "href": row["href"]})
+
+    pending = []
+    for entry in entries:
+        if entry["outlineId"] in current_ids:
+            continue
+        old_row = previous_rows.get(str(entry["outlineId"]))
+        if old_row is None:
+            stats["unmatched"] += 1
+            continue
+        candidates = by_title_href.get((old_row["title"], old_row["href"]))
+        while candidates and candidates[0]["outlineId"] in claimed:
+            candidates.popleft()
+        if candidates:
+            take(entry, candidates.popleft())
+            stats["exact"] += 1
+        else:
+            pending.append((entry, old_row))
+
+    for entry, old_row in pending:
+        match = None
+        if old_row["simhash"]:
+            for _distance, item in index.query(int(str(old_row["simhash"]), 16)):
+                if indexed_rows[item]["outlineId"] not in claimed:
+                    match = indexed_rows[item]
+                    break
+        if match is None:
+            stats["unmatched"] += 1
+            continue
+        take(entry, match)
+        if entry.get("status") == "done":
+            entry["status"] = "draft"
+        stats["sketch"] += 1
+
+    return {**map_doc, "updated_at": now_iso(), "entries": entries}, stats
+
+
+def resolve_batch_inputs(pattern: str) -> List[Path]:
+    """Expand a directory (all *.epub inside) or a glob pattern into sorted EPUB paths."""
+    root = Path(pattern)
+    if root.is_dir():
+        return sorted(root.glob("*.epub"))
+    return sorted(Path(match) for match in glob.glob(pattern, recursive=True) if match.lower().endswith(".epub"))
+
+
+def _batch_output_stems(epub_paths: List[Path]) -> List[str]:
+    stems: List[str] = []
+    used: Dict[str, int] = {}
+    for epub_path in epub_paths:
+        count = used.get(epub_path.stem, 0) + 1
+        used[epub_path.stem] = count
+        stems.append(epub_path.stem if count == 1 else f"{epub_path.stem}-{count}")
+    return stems
+
+
+def batch_extract_options(options: ParseOptions, loader: str) -> Dict[str, object]:
+    """The settings a batch index entry was extracted with; a change forces re-extraction."""
+    return {
+        "loader": loader,
+        "outline_source": "body",
+        "engine": options.engine,
+        "sketch": options.sketch,
+        "max_document_bytes": options.max_document_bytes,
+        "max_document_cpu_s": options.max_document_cpu_s,
+        "hash_algorithm": options.hash_algorithm,
+    }
+
+
+def _extract_batch_book(
+    epub_path: Path,
+    stem: str,
+    output_dir: Path,
+    previous: Optional[Dict[str, object]],
+    use_cache: bool,
+    run_options: Dict[str, object],
+) -> Dict[str, object]:
+    started = time.perf_counter()
+    json_path = output_dir / f"{stem}.outline.json"
+    md_path = output_dir / f"{stem}.outline.md"
+    entry: Dict[str, object] = {
+        "source_epub": str(epub_path),
+        "outline_json": str(json_path),
+        "outline_md": str(md_path),
+    }
+    extract_options = batch_extract_options(run_options["options"], str(run_options["loader"]))  # type: ignore[arg-type]
+    try:
+        # One mapping serves the freshness check and, if needed, the extraction; the
+        # digest computed here is the one build_outline puts in the header.
+        with EpubSource(epub_path) as source:
+            if (
+                previous is not None
+                and previous.get("status") != "failed"
+                and previous.get("source_sha256") == source.sha256()
+                # Any option that changes the outline makes the old one stale.
+                and previous.get("extract_options") == extract_options
+                and json_path.exists()
+                and md_path.exists()
+            ):
+                return {**previous, "status": "unchanged"}
+
+            cache = OutlineCache(output_dir / f"{stem}.cache.json") if use_cache else None
+            outline = build_outline(source, cache=cache, **run_options)  # type: ignore[arg-type]
+        write_text_atomic(json_path, json.dumps(outline, indent=2, ensure_ascii=False))
+        write_markdown(outline, md_path)
+        if cache is not None:
+            cache.save()
+        chapters: List[Dict[str, object]] = outline["chapters"]  # type: ignore[assignment]
+        entry.update(
+            {
+                "status": "extracted",
+                "source_sha256": outline["source_sha256"],
+                "source_size_bytes": outline["source_size_bytes"],
+                "engine": outline["engine"],
+                "hash_algorithm": outline["hash_algorithm"],
+                "extract_options": extract_options,
+                "chapters": len(chapters),
+                "sections": sum(len(chapter["sections"]) for chapter in chapters),  # type: ignore[arg-type]
+            }
+        )
+    except Exception as exc:
+        entry.update({"status": "failed", "error": str(exc)})
+    entry["timings"] = {"wall_s": round(time.perf_counter() - started, 6)}
+    return entry
+
+
+def run_batch(
+    pattern: str,
+    output_dir: Path,
+    jobs: int,
+    options: ParseOptions,
+    loader: str,
+    use_cache: bool,
+    executor: Optional[Executor] = None,
+) -> int:
+    """Extract every EPUB matching pattern and write an index of their outlines.
+
+    Books are read and dispatched on a thread each while a single process pool, shared
+    by all books, does the CPU-bound spine parsing. Books whose SHA-256 and extraction
+    options match the previous index entry are skipped without being parsed.
+    """
+    epub_paths = resolve_batch_inputs(pattern)
+    if not epub_paths:
+        print(f"No EPUB files matched: {pattern}", file=sys.stderr)
+        return 1
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index_path = output_dir / "index.json"
+    previous_books: Dict[str, Dict[str, object]] = {}
+    try:
+        previous_index = json.loads(index_path.read_text(encoding="utf-8"))
+        previous_books = {str(book["source_epub"]): book for book in previous_index.get("books", [])}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    stems = _batch_output_stems(epub_paths)
+    started = time.perf_counter()
+    if executor is not None:
+        pool_context: contextlib.AbstractContextManager = contextlib.nullcontext(executor)
+    elif jobs > 1:
+        pool_context = worker_pool(jobs)
+    else:
+        pool_context = contextlib.nullcontext(None)
+    with pool_context as pool:
+        run_options: Dict[str, object] = {"jobs": jobs, "options": options, "loader": loader, "executor": pool}
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(epub_paths)))) as books:
+            entries = list(
+                books.map(
+                    lambda item: _extract_batch_book(
+                        item[0], item[1], output_dir, previous_books.get(str(item[0])), use_cache, run_options
+                    ),
+                    zip(epub_paths, stems),
+                )
+            )
+
+    index = {
+        "generated_at": now_iso(),
+        "timings": {"wall_s": round(time.perf_counter() - started, 6)},
+        "books": entries,
+    }
+    write_text_atomic(index_path, json.dumps(index, indent=2, ensure_ascii=False))
+
+    counts = {status: sum(1 for entry in entries if entry["status"] == status) for status in ("extracted", "unchanged", "failed")}
+    print(
+        f"Batch extracted: {len(entries)} books ({counts['extracted']} extracted, "
+        f"{counts['unchanged']} unchanged, {counts['failed']} failed) -> {index_path}"
+    )
+    for entry in entries:
+        if entry["status"] == "failed":
+            print(f"  - {entry['source_epub']}: {entry['error']}", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+def parse_options_from_args(args: argparse.Namespace) -> ParseOptions:
+    return ParseOptions(
+        engine=args.engine,
+        sketch=args.sketch,
+        max_document_bytes=args.max_document_bytes or None,
+        max_document_cpu_s=args.max_document_cpu or None,
+        hash_algorithm=hash_algorithm_label(args.hash, args.hash_digest_size),
+    )
+
+
+def run_single(
+    args: argparse.Namespace,
+    epub_path: Path,
+    json_output: Path,
+    md_output: Path,
+    jobs: int,
+    cache: Optional[OutlineCache],
+    executor: Optional[Executor] = None,
+) -> int:
+    if not epub_path.exists():
+        print(f"Input EPUB not found: {epub_path}", file=sys.stderr)
+        return 1
+
+    if args.outline_source == "toc":
+        # TOC outlines never consult the spine cache; leave it untouched for body runs.
+        cache = None
+    if cache is not None:
+        cache.start_run()
+    io_stats: Dict[str, int] = {}
+    profiler = PhaseProfiler() if args.profile or args.profile_dump else None
+    c_profiler = None
+    if args.profile_dump:
+        import cProfile
+
+        c_profiler = cProfile.Profile()
+        c_profiler.enable()
+    options = parse_options_from_args(args)
+    run_options: Dict[str, object] = {
+        "jobs": jobs,
+        "cache": cache,
+        "io_stats": io_stats,
+        "options": options,
+        "loader": args.loader,
+        "profiler": profiler,
+        "executor": executor,
+        "outline_source": args.outline_source,
+        "toc_word_counts": args.toc_word_counts,
+    }
+    json_output.parent.mkdir(parents=True, exist_ok=True)
+    md_output.parent.mkdir(parents=True, exist_ok=True)
+    binary_output = Path(args.binary_output) if args.binary_output else None
+    sqlite_output = Path(args.sqlite) if args.sqlite else None
+    for extra_output in (binary_output, sqlite_output):
+        if extra_output is not None:
+            extra_output.parent.mkdir(parents=True, exist_ok=True)
+
+    previous_outline: Optional[Dict[str, object]] = None
+    if args.diff is not None:
+        previous_path = Path(args.diff) if args.diff else json_output
+        try:
+            previous_outline = load_outline(previous_path)
+        except (OSError, ValueError) as exc:
+            print(f"Previous outline unavailable for --diff ({previous_path}): {exc}", file=sys.stderr)
+            return 1
+        # Checked before extracting so a mismatched --hash or --outline-source does not overwrite
+        # the previous outline.
+        previous_algorithm = outline_hash_algorithm(previous_outline)
+        if previous_algorithm != options.hash_algorithm:
+            print(
+                f"--diff needs matching hashes: {previous_path} uses {previous_algorithm}, "
+                f"this run uses {options.hash_algorithm}",
+                file=sys.stderr,
+            )
+            return 1
+        previous_source = outline_source_of(previous_outline)
+        if previous_source != args.outline_source:
+            print(
+                f"--diff needs matching outline sources: {previous_path} was read from {previous_source}, "
+                f"this run reads {args.outline_source}",
+                file=sys.stderr,
+            )
+            return 1
+
+    extra_writers: List[OutlineWriter] = []
+    try:
+        if binary_output is not None:
+            extra_writers.append(BinaryOutlineWriter(binary_output))
+        if sqlite_output is not None:
+            extra_writers.append(SqliteOutlineWriter(sqlite_output))
+        if args.format == "ndjson":
+            chapter_count, section_count = write_streaming_outline(
+                epub_path, json_output, md_output, extra_writers=extra_writers, **run_options  # type: ignore[arg-type]
+            )
+        else:
+            outline = build_outline(epub_path, **run_options)  # type: ignore[arg-type]
+            # Markdown goes first so its timing can be included in the JSON timings block.
+            with activate_profiler(profiler):
+                with profile_phase("write_markdown"):
+                    write_markdown(outline, md_output)
+                write_text_atomic(json_output, dump_outline_json(outline, profiler))
+                if extra_writers:
+                    with profile_phase("write_extra_outputs"):
+                        write_outline_outputs(outline, extra_writers)
+            chapter_count = len(outline["chapters"])  # type: ignore[arg-type]
+            section_count = sum(len(chapter["sections"]) for chapter in outline["chapters"])  # type: ignore[attr-defined]
+    except Exception as exc:  # pragma: no cover - defensive command-line path
+        for extra_writer in extra_writers:
+            extra_writer.abort()
+        print(f"Failed to build outline: {exc}", file=sys.stderr)
+        return 1
+    if c_profiler is not None:
+        c_profiler.disable()
+        c_profiler.dump_stats(args.profile_dump)
+    if profiler is not None:
+        print(profiler.summary(), file=sys.stderr)
+
+    print(
+        f"Outline extracted: {chapter_count} chapters, {section_count} sections "
+        f"-> {json_output} and {md_output}"
+    )
+    if binary_output is not None:
+        print(f"Binary outline: {binary_output.stat().st_size} bytes -> {binary_output}")
+    if sqlite_output is not None:
+        print(f"SQLite outline: {sqlite_output.stat().st_size} bytes -> {sqlite_output}")
+    if previous_outline is not None:
+        current_outline = load_outline(json_output) if args.format == "ndjson" else outline
+        if args.carry_outline_map:
+            map_path = Path(args.carry_outline_map)
+            map_doc, carried = carry_outline_map(
+                json.loads(map_path.read_text(encoding="utf-8")), previous_outline, current_outline
+            )
+            write_text_atomic(map_path, json.dumps(map_doc, indent=2, ensure_ascii=False) + "\n")
+            print(
+                f"Outline map carried forward: {carried['kept']} kept, {carried['exact']} moved, "
+                f"{carried['sketch']} matched by sketch, {carried['unmatched']} unmatched -> {map_path}"
+            )
+        diff = diff_outlines(previous_outline, current_outline)
+        diff_output = Path(args.diff_output)
+        diff_output.parent.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(diff_output, json.dumps(diff, indent=2, ensure_ascii=False))
+        summary = diff["summary"]
+        print(
+            f"Outline diff: {summary['sections_added']} added, {summary['sections_removed']} removed, "  # type: ignore[index]
+            f"{summary['sections_moved']} moved, {summary['sections_reworded']} reworded sections "  # type: ignore[index]
+            f"across {len(diff['affected_chapters'])} chapters -> {diff_output}"  # type: ignore[arg-type]
+        )
+    if cache is not None:
+        cache.save()
+        print(f"Outline cache: {cache.hits} hits, {cache.misses} misses -> {cache.path}")
+    if args.io_stats:
+        source_size = io_stats.pop("source_size", 0)
+        phases = ", ".join(f"{phase}={count}" for phase, count in sorted(io_stats.items()) if count)
+        print(f"EPUB bytes read ({source_size} on disk, mapped once): {phases}")
+    if args.max_rss:
+        peak = peak_rss_bytes()
+        if peak is None:
+            print("Peak RSS: unavailable on this platform")
+        else:
+            print(f"Peak RSS: {peak / (1024 * 1024):.1f} MiB")
+        worker_peak = peak_rss_bytes(children=True) if jobs > 1 else None
+        if worker_peak:
+            print(f"Peak worker RSS: {worker_peak / (1024 * 1024):.1f} MiB")
+    return 0
+
+
+def _source_snapshot(paths: List[Path]) -> Dict[Path, Tuple[int, int]]:
+    snapshot: Dict[Path, Tuple[int, int]] = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def watch_sources(args: argparse.Namespace, epub_path: Path, json_output: Path, md_output: Path, jobs: int) -> int:
+    """Poll the source EPUB(s) and re-extract whenever one changes, until interrupted.
+
+    The worker pool and the spine cache stay alive between runs, so a rerun only pays for
+    the spine members whose CRC/size changed. A change is picked up once the file has
+    stopped changing for one poll interval, so a copy in progress is never parsed. A run that
+    raises is reported on stderr and the watch keeps polling.
+    """
+
+    def watched_paths() -> List[Path]:
+        return resolve_batch_inputs(args.batch) if args.batch else [epub_path]
+
+    cache = None if args.no_cache else OutlineCache(Path(args.cache))
+    pool_context = worker_pool(jobs) if jobs > 1 else contextlib.nullcontext(None)
+    built: Optional[Dict[Path, Tuple[int, int]]] = None
+    last_poll: Optional[Dict[Path, Tuple[int, int]]] = None
+    print(f"Watching {args.batch or epub_path} every {args.watch_interval:g}s (Ctrl+C to stop)")
+    with pool_context as pool:
+        try:
+            while True:
+                snapshot = _source_snapshot(watched_paths())
+                if snapshot and snapshot != built and snapshot == last_poll:
+                    try:
+                        if args.batch:
+                            run_batch(
+                                args.batch,
+                                Path(args.batch_output),
+                                jobs=jobs,
+                                options=parse_options_from_args(args),
+                                loader=args.loader,
+                                use_cache=not args.no_cache,
+                                executor=pool,
+                            )
+                        else:
+                            run_single(args, epub_path, json_output, md_output, jobs, cache, executor=pool)
+                    except Exception as exc:
+                        # One bad run must not end the watch; it is retried once the sources change again.
+                        print(f"Watch run failed: {type(exc).__name__}: {exc}", file=sys.stderr)
+                    built = snapshot
+                last_poll = snapshot
+                time.sleep(args.watch_interval)
+        except KeyboardInterrupt:
+            print("Watch stopped.")
     return 0
 
 
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extract a structure-only outline from an EPUB.")
+    parser.add_argument("--input", default="content/source/sybex.epub", help="Input EPUB path")
+    parser.add_argument(
+        "--batch",
+        help="Directory or glob of EPUBs to extract concurrently instead of --input",
+    )
+    parser.add_argument(
+        "--batch-output",
+        default="content/_source_outline/books",
+        help="Directory for per-book outlines and index.json in --batch mode",
+    )
+    parser.add_argument(
+        "--json-output",
+        help="Output JSON path (default: content/_source_outline/book_outline.json, .ndjson with --format ndjson)",
+    )
+    parser.add_argument(
+        "--md-output",
+        default="content/_source_outline/book_outline.md",
+        help="Output Markdown path",
+    )
+    parser.add_argument(
+        "--binary-output",
+        help="Also write the compact binary outline (fixed-width records, raw hashes) to this path",
+    )
+    parser.add_argument(
+        "--sqlite",
+        help="Also write the outline to this SQLite database (indexed chapters/sections, FTS5 on section titles)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Parse spine documents across N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "ndjson"),
+        default="json",
+        help="json writes one document; ndjson streams one chapter record per line",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=("auto",) + LOADER_ENGINES,
+        default="auto",
+        help="Spine loader; auto prefers EbookLib and falls back to the zip parser",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=PARSER_ENGINES,
+        default="html",
+        help="Spine document parser; expat falls back to html per document on malformed XML",
+    )
+    parser.add_argument(
+        "--outline-source",
+        choices=OUTLINE_SOURCES,
+        default="body",
+        help="Build sections from heading tags in chapter bodies, or from the nav document/NCX (toc)",
+    )
+    parser.add_argument(
+        "--toc-word-counts",
+        action="store_true",
+        help="With --outline-source toc, also inflate chapters for word counts and content hashes",
+    )
+    parser.add_argument(
+        "--max-document-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="Parse at most this many bytes of each spine document; the rest is marked incomplete (0 = no limit)",
+    )
+    parser.add_argument(
+        "--max-document-cpu",
+        type=float,
+        default=60.0,
+        help="CPU seconds allowed per spine document before it is cut off and marked incomplete (0 = no limit)",
+    )
+    parser.add_argument(
+        "--hash",
+        choices=HASH_ALGORITHMS,
+        default=DEFAULT_HASH_ALGORITHM,
+        help="Digest for section/chapter hashes, recorded as hash_algorithm; outlines only compare under the same one",
+    )
+    parser.add_argument(
+        "--hash-digest-size",
+        type=int,
+        default=32,
+        help="Digest size in bytes for --hash blake2b (8-64)",
+    )
+    parser.add_argument(
+        "--sketch",
+        action="store_true",
+        help="Add a 64-bit SimHash of each section's words (simhash) for near-duplicate matching",
+    )
+    parser.add_argument(
+        "--carry-outline-map",
+        metavar="MAP",
+        help="With --diff, repoint this outline_map.json at the new outline, matching reworded sections by sketch",
+    )
+    parser.add_argument(
+        "--diff",
+        nargs="?",
+        const="",
+        metavar="PREVIOUS",
+        help="Diff the new outline against PREVIOUS (default: the outline being replaced)",
+    )
+    parser.add_argument(
+        "--diff-output",
+        default="content/_source_outline/book_outline.diff.json",
+        help="Where --diff writes added/removed/moved/reworded sections",
+    )
+    parser.add_argument(
+        "--cache",
+        default="content/_source_outline/book_outline.cache.json",
+        help="Per-spine-item parse cache path",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Reparse every spine item")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record wall/CPU time and bytes per phase and per spine document in a timings block; totals go to stderr",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        help="Also write cProfile stats for the main process to this path",
+    )
+    parser.add_argument(
+        "--io-stats",
+        action="store_true",
+        help="Report bytes read from the EPUB by each extraction phase",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-extract whenever the source EPUB (or --batch inputs) change",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between source polls in --watch mode",
+    )
+    parser.add_argument(
+        "--max-rss",
+        action="store_true",
+        help="Report peak resident set size after extraction",
+    )
+    args = parser.parse_args()
+
+    epub_path = Path(args.input)
+    default_json_name = "book_outline.ndjson" if args.format == "ndjson" else "book_outline.json"
+    json_output = Path(args.json_output or f"content/_source_outline/{default_json_name}")
+    md_output = Path(args.md_output)
+
+    if args.jobs < 0:
+        print("--jobs must be zero or a positive integer", file=sys.stderr)
+        return 1
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.carry_outline_map and args.diff is None:
+        print("--carry-outline-map needs --diff to know which outline the map was made against", file=sys.stderr)
+        return 1
+    if args.toc_word_counts and args.outline_source != "toc":
+        print("--toc-word-counts requires --outline-source toc", file=sys.stderr)
+        return 1
+    if args.hash_digest_size not in BLAKE2B_DIGEST_SIZES:
+        print("--hash-digest-size must be between 8 and 64 bytes", file=sys.stderr)
+        return 1
+    if args.hash_digest_size != 32 and args.hash != "blake2b":
+        print("--hash-digest-size only applies to --hash blake2b", file=sys.stderr)
+        return 1
+    if args.batch and args.outline_source != "body":
+        print("--batch always parses chapter bodies; drop --outline-source toc", file=sys.stderr)
+        return 1
+
+    if args.watch:
+        return watch_sources(args, epub_path, json_output, md_output, jobs)
+    if args.batch:
+        return run_batch(
+            args.batch,
+            Path(args.batch_output),
+            jobs=jobs,
+            options=parse_options_from_args(args),
+            loader=args.loader,
+            use_cache=not args.no_cache,
+        )
+    cache = None if args.no_cache else OutlineCache(Path(args.cache))
+    return run_single(args, epub_path, json_output, md_output, jobs, cache)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,132 @@
+// Reader for `extract_epub_outline.py --binary-output`. The layout is documented on
+// BinaryOutlineWriter and fixed by its BINARY_HEADER, BINARY_CHAPTER and BINARY_SECTION
+// structs (all little-endian); the field offsets below must match them. Table positions and
+// record widths come from the header, and records are decoded only when asked for.
+
+const MAGIC = 'EPOB';
+const VERSION = 1;
+
+// BINARY_HEADER: magic, version, hash width, counts, record widths, table offsets.
+const HEADER = {
+  size: 44,
+  version: 4,
+  hashSize: 6,
+  chapterCount: 8,
+  sectionCount: 12,
+  chapterWidth: 16,
+  sectionWidth: 18,
+  chaptersOffset: 20,
+  sectionsOffset: 24,
+  stringsOffset: 28,
+  metaOffset: 36,
+  metaLength: 40
+};
+
+// BINARY_CHAPTER; the raw hash follows the fixed fields.
+const CHAPTER = {
+  order: 0,
+  chapterNumber: 4,
+  wordCount: 8,
+  titleOffset: 12,
+  titleLength: 16,
+  hrefOffset: 20,
+  hrefLength: 24,
+  firstSection: 28,
+  sectionCount: 32,
+  hash: 36
+};
+
+// BINARY_SECTION; the raw hash follows the fixed fields.
+const SECTION = {
+  order: 0,
+  chapterIndex: 4,
+  level: 8,
+  wordCount: 12,
+  titleOffset: 16,
+  titleLength: 20,
+  hrefOffset: 24,
+  hrefLength: 28,
+  hash: 32
+};
+
+// Marks a word count that was not computed (`--outline-source toc`).
+const NO_WORD_COUNT = 0xffffffff;
+
+export function isOutlineBinary(bytes) {
+  return bytes.length >= HEADER.size && Buffer.from(bytes.buffer, bytes.byteOffset, 4).toString('latin1') === MAGIC;
+}
+
+export function openOutlineBinary(bytes) {
+  if (!isOutlineBinary(bytes)) throw new Error('Not a binary outline (missing EPOB header).');
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const version = view.getUint16(HEADER.version, true);
+  if (version !== VERSION) throw new Error(`Unsupported binary outline version ${version}.`);
+
+  const hashSize = view.getUint16(HEADER.hashSize, true);
+  const chapterCount = view.getUint32(HEADER.chapterCount, true);
+  const sectionCount = view.getUint32(HEADER.sectionCount, true);
+  const chapterWidth = view.getUint16(HEADER.chapterWidth, true);
+  const sectionWidth = view.getUint16(HEADER.sectionWidth, true);
+  const chaptersOffset = view.getUint32(HEADER.chaptersOffset, true);
+  const sectionsOffset = view.getUint32(HEADER.sectionsOffset, true);
+  const stringsOffset = view.getUint32(HEADER.stringsOffset, true);
+  const decoder = new TextDecoder('utf-8');
+
+  // Strings are (offset, length) pairs into the string table; the arguments locate that pair.
+  const readString = (offsetField, lengthField) => {
+    const start = stringsOffset + view.getUint32(offsetField, true);
+    return decoder.decode(bytes.subarray(start, start + view.getUint32(lengthField, true)));
+  };
+  const readHash = (offset) => Buffer.from(bytes.buffer, bytes.byteOffset + offset, hashSize).toString('hex');
+  const readWordCount = (offset) => {
+    const count = view.getUint32(offset, true);
+    return count === NO_WORD_COUNT ? null : count;
+  };
+  // The outline header fields are stored as JSON in the string table.
+  const header = JSON.parse(readString(HEADER.metaOffset, HEADER.metaLength));
+
+  const sectionAt = (index) => {
+    if (index < 0 || index >= sectionCount) throw new RangeError(`section index ${index} out of range`);
+    const offset = sectionsOffset + index * sectionWidth;
+    return {
+      order: view.getUint32(offset + SECTION.order, true),
+      chapterIndex: view.getUint32(offset + SECTION.chapterIndex, true),
+      level: view.getUint8(offset + SECTION.level),
+      title: readString(offset + SECTION.titleOffset, offset + SECTION.titleLength),
+      href: readString(offset + SECTION.hrefOffset, offset + SECTION.hrefLength),
+      word_count: readWordCount(offset + SECTION.wordCount),
+      hash: readHash(offset + SECTION.hash)
+    };
+  };
+
+  const chapterAt = (index) => {
+    if (index < 0 || index >= chapterCount) throw new RangeError(`chapter index ${index} out of range`);
+    const offset = chaptersOffset + index * chapterWidth;
+    const chapterNumber = view.getInt32(offset + CHAPTER.chapterNumber, true);
+    return {
+      order: view.getUint32(offset + CHAPTER.order, true),
+      chapter_number: chapterNumber < 0 ? null : chapterNumber,
+      href: readString(offset + CHAPTER.hrefOffset, offset + CHAPTER.hrefLength),
+      title: readString(offset + CHAPTER.titleOffset, offset + CHAPTER.titleLength),
+      word_count: readWordCount(offset + CHAPTER.wordCount),
+      hash: readHash(offset + CHAPTER.hash),
+      firstSection: view.getUint32(offset + CHAPTER.firstSection, true),
+      sectionCount: view.getUint32(offset + CHAPTER.sectionCount, true)
+    };
+  };
+
+  // Chapters in the JSON outline shape, decoded one at a time as they are iterated.
+  function* chapters() {
+    for (let index = 0; index < chapterCount; index += 1) {
+      const { firstSection, sectionCount: count, ...chapter } = chapterAt(index);
+      const sections = [];
+      for (let step = 0; step < count; step += 1) {
+        const { chapterIndex, ...section } = sectionAt(firstSection + step);
+        sections.push(section);
+      }
+      yield { ...chapter, sections };
+    }
+  }
+
+  return { header, hashSize, chapterCount, sectionCount, chapterAt, sectionAt, chapters };
+}
@@ -11,10 +11,40 @@ const strictSchemaMode = ['1', 'true'].includes(String(process.env.CI ?? '').toL
 
 const cwd = process.cwd();
 const lessonsDir = path.join(cwd, 'content', 'chapter_lessons');
+// pack_id -> file, module and page ids, so lib/lessonLoader.ts does not parse every lesson
+// on a cold start to find one.
+const indexPath = path.join(cwd, 'lib', 'generated', 'lesson_index.json');
 const schemaFiles = strictSchemaMode
   ? ['chapter_lessons.v3.schema.json']
   : ['chapter_lessons.v3.schema.json', 'chapter_lessons.v2.schema.json', 'chapter_lessons.schema.json'];
 
+// Must match fileStamp() in lib/lessonLoader.ts; a changed stamp makes the loader re-read the file.
+function fileStamp(fullPath) {
+  const stat = fs.statSync(fullPath);
+  return `${stat.mtimeMs}:${stat.size}`;
+}
+
+function indexEntry(file, stamp, lesson) {
+  if (typeof lesson?.pack_id !== 'string' || !Array.isArray(lesson.modules)) return null;
+  return {
+    file,
+    stamp,
+    pack_id: lesson.pack_id,
+    version: lesson.version,
+    module_ids: lesson.modules.map((module) => module.id),
+    page_ids: lesson.modules.flatMap((module) => (module.pages ?? []).map((page) => page.id))
+  };
+}
+
+function writeLessonIndex(entries) {
+  const index = {
+    version: 1,
+    lessons: [...entries].sort((a, b) => a.file.localeCompare(b.file, undefined, { numeric: true, sensitivity: 'base' }))
+  };
+  fs.mkdirSync(path.dirname(indexPath), { recursive: true });
+  fs.writeFileSync(indexPath, `${JSON.stringify(index, null, 2)}\n`);
+}
+
 function formatAjvError(error) {
   let pathPart = error.instancePath || '';
   if (error.keyword === 'required' && error.params?.missingProperty) {
@@ -59,9 +89,11 @@ if (files.length === 0) {
 }
 
 let invalidCount = 0;
+const indexEntries = [];
 
 files.forEach((file) => {
   const fullPath = path.join(lessonsDir, file);
+  const stamp = fileStamp(fullPath);
   let data;
   try {
     data = JSON.parse(fs.readFileSync(fullPath, 'utf8'));
@@ -71,6 +103,9 @@ files.forEach((file) => {
     console.error(`  - /: invalid JSON (${err.message})`);
     return;
   }
+  // The loader validates a lesson when it is served, so the index lists every parseable one.
+  const entry = indexEntry(file, stamp, data);
+  if (entry) indexEntries.push(entry);
 
   const valid = validators.some((validate) => validate(data));
   if (!valid) {
@@ -83,6 +118,8 @@ files.forEach((file) => {
   }
 });
 
+writeLessonIndex(indexEntries);
+
 if (invalidCount === 0) {
   console.log(`All ${files.length} lesson file(s) valid.`);
 } else {
@@ -1,3 +1,4 @@
+import crypto from 'crypto';
 import fs from 'fs';
 import path from 'path';
 import Ajv from 'ajv/dist/2020.js';
@@ -15,6 +16,35 @@ const allSchemaFiles = ['chapter_pack.v2.schema.json', 'chapter_pack.schema.json
 const schemaFiles = strictSchemaMode
   ? ['chapter_pack.v2.schema.json']
   : allSchemaFiles;
+// Hashes of packs that passed schema validation; lib/packLoader.ts skips Ajv for them.
+const manifestPath = path.join(cwd, 'lib', 'generated', 'validated_packs.json');
+
+function sha256(data) {
+  return crypto.createHash('sha256').update(data).digest('hex');
+}
+
+// Must match schemaDigest() in lib/packLoader.ts and scripts/build-pack-validators.mjs.
+function schemaDigest(files) {
+  const hash = crypto.createHash('sha256');
+  files.forEach((file) => {
+    hash.update(`${file}\n`);
+    hash.update(fs.readFileSync(path.join(packsDir, file)));
+    hash.update('\n');
+  });
+  return hash.digest('hex');
+}
+
+function writeValidatedManifest(packHashes) {
+  // Keyed to every schema the runtime loader accepts, not just the ones checked here.
+  const runtimeSchemas = allSchemaFiles.filter((file) => fs.existsSync(path.join(packsDir, file)));
+  const manifest = {
+    version: 1,
+    schema_digest: schemaDigest(runtimeSchemas),
+    packs: Object.fromEntries([...packHashes].sort(([a], [b]) => a.localeCompare(b)))
+  };
+  fs.mkdirSync(path.dirname(manifestPath), { recursive: true });
+  fs.writeFileSync(manifestPath, `${JSON.stringify(manifest, null, 2)}\n`);
+}
 
 function formatAjvError(error) {
   let pathPart = error.instancePath || '';
@@ -133,12 +163,15 @@ if (files.length === 0) {
 }
 
 let invalidCount = 0;
+const validatedHashes = new Map();
 
 files.forEach((file) => {
   const fullPath = path.join(packsDir, file);
+  let raw;
   let data;
   try {
-    data = JSON.parse(fs.readFileSync(fullPath, 'utf8'));
+    raw = fs.readFileSync(fullPath);
+    data = JSON.parse(raw.toString('utf8'));
   } catch (err) {
     invalidCount += 1;
     console.error(`\n${file}`);
@@ -156,6 +189,7 @@ files.forEach((file) => {
     });
     return;
   }
+  validatedHashes.set(file, sha256(raw));
 
   const questionBank = Array.isArray(data?.question_bank) ? data.question_bank : [];
   const hintLintErrors = questionBank.flatMap((question, index) => lintQuestionHints(question, index));
@@ -168,6 +202,8 @@ files.forEach((file) => {
   }
 });
 
+writeValidatedManifest(validatedHashes);
+
 if (invalidCount === 0) {
   console.log(`All ${files.length} pack(s) valid.`);
 } else {